@@ -0,0 +1,146 @@
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from fastapi import HTTPException
+
+INTERACTIVE = 0
+BULK = 1
+
+# Prioridad de la petición en curso; la leen las pasadas del modelo
+CURRENT_PRIORITY = contextvars.ContextVar("current_priority", default=INTERACTIVE)
+
+
+class Lane:
+    """
+    Carril de admisión con concurrencia y cola acotadas.
+
+    Si todos los cupos están ocupados y la cola está llena, la petición se
+    rechaza de inmediato con 429; si espera en la cola más de 'max_wait'
+    segundos, con 503. Ambas respuestas incluyen Retry-After.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        priority: int,
+        concurrency: int,
+        queue_size: int,
+        max_wait: float,
+        retry_after: int,
+    ):
+        self.name = name
+        self.priority = priority
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    def _overloaded(self, status_code: int, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Espera un cupo del carril y marca la prioridad de la petición.
+        """
+        start = time.monotonic()
+        if not self.semaphore.locked():
+            await self.semaphore.acquire()
+        elif self.waiting >= self.queue_size:
+            self.rejected += 1
+            raise self._overloaded(
+                429, "Servidor ocupado: la cola de peticiones está llena."
+            )
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise self._overloaded(
+                    503, "Servidor ocupado: se agotó el tiempo de espera en la cola."
+                )
+            finally:
+                self.waiting -= 1
+
+        wait = time.monotonic() - start
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait_seen = max(self.max_wait_seen, wait)
+        self.active += 1
+        token = CURRENT_PRIORITY.set(self.priority)
+        try:
+            yield
+        finally:
+            CURRENT_PRIORITY.reset(token)
+            self.active -= 1
+            self.semaphore.release()
+
+    def metrics(self) -> dict:
+        return {
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(1000 * self.total_wait / max(self.admitted, 1), 2),
+            "max_wait_ms": round(1000 * self.max_wait_seen, 2),
+        }
+
+
+class PriorityGate:
+    """
+    Cupos de ejecución del modelo que se asignan por prioridad.
+
+    Se toma un cupo por cada lote de ventanas, así que un archivo grande cede
+    el modelo entre lotes y las peticiones interactivas pasan primero.
+    """
+
+    def __init__(self, slots: int = 1):
+        self.slots = slots
+        self.free = slots
+        self.waiting = {INTERACTIVE: 0, BULK: 0}
+        self.condition = threading.Condition()
+
+    @contextmanager
+    def slot(self, priority: int | None = None):
+        priority = CURRENT_PRIORITY.get() if priority is None else priority
+        with self.condition:
+            self.waiting[priority] += 1
+            while self.free == 0 or any(
+                self.waiting[p] for p in self.waiting if p < priority
+            ):
+                self.condition.wait()
+            self.waiting[priority] -= 1
+            self.free -= 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.free += 1
+                self.condition.notify_all()
+
+    def metrics(self) -> dict:
+        return {
+            "slots": self.slots,
+            "busy": self.slots - self.free,
+            "waiting_interactive": self.waiting[INTERACTIVE],
+            "waiting_bulk": self.waiting[BULK],
+        }
@@ -0,0 +1,251 @@
+"""
+Agregados del dashboard compartidos por los modos exacto (main.py),
+incremental (incremental.py) y aproximado (sketches.py).
+"""
+
+import re
+
+import pandas as pd
+
+ACCOUNT_TYPES = ["Institucionales", "Medios de Comunicación", "General", "Bots"]
+TYPE_SENTIMENTS = ["positivo", "negativo", "neutro"]
+TOTAL_COLUMNS = {
+    "total_retweets": "Retweets",
+    "total_likes": "Likes",
+    "total_views": "Views",
+    "total_comments": "Comments",
+}
+
+# Palabras excluidas del conteo de palabras más frecuentes
+STOPWORDS = set(
+    [
+        "de",
+        "la",
+        "que",
+        "el",
+        "en",
+        "y",
+        "a",
+        "los",
+        "del",
+        "se",
+        "las",
+        "por",
+        "un",
+        "para",
+        "con",
+        "no",
+        "una",
+        "su",
+        "al",
+        "es",
+        "lo",
+        "como",
+        "más",
+        "pero",
+        "sus",
+        "le",
+        "ya",
+        "o",
+        "este",
+        "sí",
+        "porque",
+        "esta",
+        "entre",
+        "cuando",
+        "muy",
+        "sin",
+        "sobre",
+        "también",
+        "me",
+        "hasta",
+        "hay",
+        "donde",
+        "quien",
+        "desde",
+        "todo",
+        "nos",
+        "durante",
+        "todos",
+        "uno",
+        "les",
+        "ni",
+        "contra",
+        "otros",
+        "ese",
+        "eso",
+        "ante",
+        "ellos",
+        "e",
+        "esto",
+        "mí",
+        "antes",
+        "algunos",
+        "qué",
+        "unos",
+        "yo",
+        "otro",
+        "otras",
+        "otra",
+        "él",
+        "tanto",
+        "esa",
+        "estos",
+        "mucho",
+        "quienes",
+        "nada",
+        "muchos",
+        "cual",
+        "poco",
+        "ella",
+        "estar",
+        "estas",
+        "algunas",
+        "algo",
+        "nosotros",
+        "mi",
+        "mis",
+        "tú",
+        "te",
+        "ti",
+        "tu",
+        "tus",
+        "ellas",
+        "nosotras",
+        "vosotros",
+        "vosotras",
+        "os",
+        "mío",
+        "mía",
+        "míos",
+        "mías",
+        "tuyo",
+        "tuya",
+        "tuyos",
+        "tuyas",
+        "suyo",
+        "suya",
+        "suyos",
+        "suyas",
+        "nuestro",
+        "nuestra",
+        "nuestros",
+        "nuestras",
+        "vuestro",
+        "vuestra",
+        "vuestros",
+        "vuestras",
+        "esos",
+        "esas",
+        "estoy",
+        "estás",
+        "está",
+        "estamos",
+        "estáis",
+        "están",
+        "esté",
+        "estés",
+        "estemos",
+        "estéis",
+        "estén",
+        "estaré",
+        "estarás",
+        "estará",
+        "estaremos",
+        "estaréis",
+        "estarán",
+        "estaría",
+        "estarías",
+        "estaríamos",
+        "estaríais",
+        "estarían",
+        "estaba",
+        "estabas",
+        "estábamos",
+        "estabais",
+        "estaban",
+        "estuve",
+        "estuviste",
+        "estuvo",
+        "estuvimos",
+        "estuvisteis",
+        "estuvieron",
+        "estuviera",
+        "estuvieras",
+        "estuviéramos",
+        "estuvierais",
+        "estuvieran",
+        "estuviese",
+        "estuvieses",
+        "estuviésemos",
+        "estuvieseis",
+        "estuviesen",
+        "estando",
+        "estado",
+        "estada",
+        "estados",
+        "estadas",
+        "estad",
+        "http",
+        "https",
+        "www",
+        "com",
+        "co",
+        "org",
+        "net",
+        "es",
+        "bin",
+        "bit",
+        "cada",
+        "asi",
+        "así",
+        "solo",
+        "sólo",
+        "si",
+        "tras",
+    ]
+)
+
+
+def top_word_tokens(texts: pd.Series, stopwords: set = STOPWORDS) -> list[str]:
+    """
+    Palabras que cuentan para 'top_words': en minúsculas, sin puntuación, de
+    más de dos letras y fuera de 'stopwords'.
+    """
+    all_text = " ".join(texts.dropna().astype(str)).lower()
+    words = re.findall(r"\b\w+\b", all_text)
+    return [w for w in words if w not in stopwords and len(w) > 2]
+
+
+def column_totals(df: pd.DataFrame) -> dict:
+    """
+    Totales de 'Retweets', 'Likes', 'Views' y 'Comments' (0 si falta la columna).
+    """
+    return {
+        key: int(df[col].sum()) if col in df.columns else 0
+        for key, col in TOTAL_COLUMNS.items()
+    }
+
+
+def account_type_counts(df: pd.DataFrame) -> tuple[dict, dict]:
+    """
+    Conteo por tipo de cuenta y filas de cada sentimiento por tipo de cuenta.
+
+    Parámetros:
+        df (pd.DataFrame): Filas clasificadas (con 'Sentimiento').
+
+    Retorna:
+        tuple[dict, dict]: 'conteo_tipo_cuenta' ({tipo: total}) y
+        'sentimiento_tipo_cuenta' ({tipo: {sentimiento: filas}}).
+    """
+    conteo = {}
+    por_sentimiento = {}
+    for tipo in ACCOUNT_TYPES:
+        if tipo in df.columns:
+            values = pd.to_numeric(df[tipo], errors="coerce").fillna(0)
+            conteo[tipo] = int(values.sum())
+            por_sentimiento[tipo] = {
+                sent: int(((values > 0) & (df["Sentimiento"] == sent)).sum())
+                for sent in TYPE_SENTIMENTS
+            }
+    return conteo, por_sentimiento
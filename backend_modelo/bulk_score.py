@@ -0,0 +1,297 @@
+"""
+Clasificación masiva de archivos CSV/XLSX desde la línea de comandos.
+
+Uso:
+    python bulk_score.py "exports/**/*.csv" "exports/*.xlsx" -o resultados/
+
+Por cada archivo escribe el archivo anotado (columna 'Sentimiento') y un JSON
+con los agregados 'data' del dashboard, replicando bajo la carpeta de salida
+la estructura de carpetas de las entradas. Las etiquetas se guardan por bloques
+en un checkpoint, de modo que una ejecución interrumpida continúa donde quedó.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from main import (
+    LABEL_DICTIONARY,
+    build_dashboard_data,
+    convert_columns,
+    label_codes,
+    predict_labels,
+    read_table,
+)
+
+CHECKPOINT_DIR = ".checkpoints"
+
+
+def expand_inputs(patterns: list[str]) -> list[str]:
+    """
+    Expande los patrones glob de entrada a una lista ordenada de archivos.
+    """
+    paths = []
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) or [pattern]
+        paths.extend(
+            path
+            for path in sorted(matches)
+            if os.path.isfile(path) and path.endswith((".csv", ".xls", ".xlsx"))
+        )
+    unique = {}
+    for path in paths:
+        unique.setdefault(os.path.abspath(path), path)
+    return list(unique.values())
+
+
+def output_names(paths: list[str]) -> dict[str, str]:
+    """
+    Nombre de salida de cada archivo: su ruta relativa a la carpeta común de
+    todas las entradas, sin extensión (p. ej. '2024/a' para 'in/2024/a.csv').
+
+    Lanza ValueError si dos entradas producen el mismo nombre (p. ej. 'a.csv'
+    y 'a.xlsx' en la misma carpeta), ya que una sobrescribiría a la otra.
+    """
+    if not paths:
+        return {}
+    root = os.path.commonpath(
+        [os.path.dirname(os.path.abspath(path)) for path in paths]
+    )
+    names = {}
+    sources = {}
+    for path in paths:
+        relative = os.path.relpath(os.path.abspath(path), root)
+        name = os.path.splitext(relative)[0]
+        if name in sources:
+            raise ValueError(
+                f"{sources[name]} y {path} escribirían la misma salida ({name})."
+            )
+        sources[name] = path
+        names[path] = name
+    return names
+
+
+def read_source(path: str) -> pd.DataFrame:
+    """
+    Lee y convierte un archivo de entrada (se ejecuta en los hilos lectores).
+    """
+    with open(path, "rb") as f:
+        contents = f.read()
+    df = convert_columns(read_table(os.path.basename(path), contents))
+    if "Post Body" not in df.columns:
+        raise ValueError("El archivo no contiene la columna 'Post Body'.")
+    return df
+
+
+class Checkpoint:
+    """
+    Etiquetas ya calculadas de un archivo, guardadas como códigos uint8.
+
+    El archivo '.codes' crece por bloques (un byte por fila, índice en
+    LABEL_DICTIONARY); el '.json' identifica la versión del archivo de origen
+    y el modo de ventanas para descartar checkpoints de un archivo que cambió
+    o que se clasificó con otro modo.
+    """
+
+    def __init__(
+        self, output_dir: str, name: str, source: str, sliding_window: bool = True
+    ):
+        base = os.path.join(output_dir, CHECKPOINT_DIR, name)
+        self.codes_path = base + ".codes"
+        self.meta_path = base + ".json"
+        stat = os.stat(source)
+        self.meta = {
+            "source": os.path.abspath(source),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sliding_window": sliding_window,
+        }
+
+    def load(self) -> list[str]:
+        """
+        Devuelve las etiquetas guardadas, o una lista vacía si no son válidas.
+        """
+        try:
+            with open(self.meta_path) as f:
+                if json.load(f) != self.meta:
+                    return []
+            with open(self.codes_path, "rb") as f:
+                codes = np.frombuffer(f.read(), dtype=np.uint8)
+        except (OSError, ValueError):
+            return []
+        return [LABEL_DICTIONARY[code] for code in codes]
+
+    def reset(self):
+        """
+        Inicia un checkpoint vacío para la versión actual del archivo.
+        """
+        os.makedirs(os.path.dirname(self.codes_path), exist_ok=True)
+        with open(self.meta_path, "w") as f:
+            json.dump(self.meta, f)
+        open(self.codes_path, "wb").close()
+
+    def append(self, labels: list[str]):
+        """
+        Añade un bloque de etiquetas y lo persiste en disco.
+        """
+        with open(self.codes_path, "ab") as f:
+            f.write(label_codes(labels).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self):
+        """
+        Borra el checkpoint una vez escritos los resultados.
+        """
+        for path in [self.codes_path, self.meta_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def output_paths(output_dir: str, name: str, fmt: str) -> tuple[str, str]:
+    """
+    Rutas del archivo anotado y del JSON de agregados de un archivo de entrada.
+    """
+    return (
+        os.path.join(output_dir, f"{name}_sentimiento.{fmt}"),
+        os.path.join(output_dir, f"{name}_data.json"),
+    )
+
+
+def score_file(
+    path: str, name: str, df: pd.DataFrame, args: argparse.Namespace
+) -> tuple[str, str]:
+    """
+    Clasifica un archivo por bloques reanudables y escribe sus resultados.
+
+    Parámetros:
+        path (str): Ruta del archivo de origen.
+        name (str): Nombre de salida del archivo (ver output_names).
+        df (pd.DataFrame): Datos ya leídos y convertidos.
+        args (argparse.Namespace): Opciones de la línea de comandos.
+
+    Retorna:
+        tuple[str, str]: Rutas del archivo anotado y del JSON de agregados.
+    """
+    checkpoint = Checkpoint(args.output, name, path, args.sliding_window)
+    labels = checkpoint.load()[: len(df)]
+    if labels:
+        print(f"{path}: reanudando desde la fila {len(labels)}", file=sys.stderr)
+    else:
+        checkpoint.reset()
+
+    textos = df["Post Body"].tolist()
+    for start in range(len(labels), len(textos), args.checkpoint_rows):
+        chunk = predict_labels(
+            textos[start : start + args.checkpoint_rows], args.sliding_window
+        )
+        checkpoint.append(chunk)
+        labels.extend(chunk)
+        print(f"{path}: {len(labels)}/{len(textos)} filas", file=sys.stderr)
+
+    df["Sentimiento"] = labels
+    columns = df.columns.tolist()
+    # Parquet conserva tipos y nulos: se guarda antes de la limpieza de
+    # build_dashboard_data (fillna("") mezclaría números y cadenas)
+    annotated = df.copy() if args.format == "parquet" else None
+    df, data = build_dashboard_data(df, approximate=args.approximate)
+
+    annotated_path, data_path = output_paths(args.output, name, args.format)
+    os.makedirs(os.path.dirname(annotated_path), exist_ok=True)
+    if annotated is not None:
+        annotated.to_parquet(annotated_path, index=False)
+    else:
+        df[columns].to_csv(annotated_path, index=False)
+    with open(data_path, "wb") as f:
+        f.write(
+            orjson.dumps(
+                {"data": data, "columns": columns},
+                default=str,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            )
+        )
+    checkpoint.remove()
+    return annotated_path, data_path
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Clasifica el sentimiento de archivos CSV/XLSX en lote."
+    )
+    parser.add_argument("inputs", nargs="+", help="Archivos o patrones glob.")
+    parser.add_argument("-o", "--output", required=True, help="Carpeta de salida.")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument(
+        "--readers", type=int, default=2, help="Hilos lectores de archivos."
+    )
+    parser.add_argument(
+        "--checkpoint-rows",
+        type=int,
+        default=5000,
+        help="Filas clasificadas entre checkpoints.",
+    )
+    parser.add_argument(
+        "--no-sliding-window",
+        dest="sliding_window",
+        action="store_false",
+        help="Trunca los textos largos en lugar de usar ventanas deslizantes.",
+    )
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        help="Calcula palabras y usuarios principales con resúmenes aproximados.",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Vuelve a procesar archivos que ya tienen resultados.",
+    )
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    try:
+        names = output_names(expand_inputs(args.inputs))
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    paths = []
+    for path, name in names.items():
+        if not args.overwrite and all(
+            os.path.exists(p) for p in output_paths(args.output, name, args.format)
+        ):
+            print(f"{path}: ya procesado, se omite", file=sys.stderr)
+            continue
+        paths.append(path)
+
+    failures = 0
+    # Los lectores preparan los siguientes archivos mientras el modelo clasifica
+    with ThreadPoolExecutor(max_workers=max(args.readers, 1)) as executor:
+        pending = deque()
+        queue = deque(paths)
+        while queue or pending:
+            while queue and len(pending) < max(args.readers, 1):
+                path = queue.popleft()
+                pending.append((path, executor.submit(read_source, path)))
+            path, future = pending.popleft()
+            try:
+                annotated_path, data_path = score_file(
+                    path, names[path], future.result(), args
+                )
+                print(f"{path}: -> {annotated_path}, {data_path}", file=sys.stderr)
+            except Exception as e:
+                failures += 1
+                detail = getattr(e, "detail", None) or str(e)
+                print(f"{path}: error: {detail}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se serializa dentro del proceso
+    fcntl = None
+
+from aggregates import (
+    STOPWORDS,
+    TOTAL_COLUMNS,
+    TYPE_SENTIMENTS,
+    account_type_counts,
+    column_totals,
+    top_word_tokens,
+)
+from timeseries import bucket_labels, epoch_buckets, normalize_dates
+
+# Contadores que se eliminan al llegar a cero (el resto conserva sus claves)
+PRUNED = {"sentiment_counts", "sentiment_month", "words", "user_rows"}
+
+# Columnas internas añadidas a las filas guardadas
+KEY_COLUMNS = ["_key", "_version", "_text_hash"]
+
+
+def hash_rows(df: pd.DataFrame) -> pd.Series:
+    """
+    Hash uint64 vectorizado del contenido de cada fila.
+    """
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+def row_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula la identidad, la versión y el hash del texto de cada fila.
+
+    La identidad es el 'Tweet URL' cuando existe (o el hash del contenido si
+    no), desambiguada con el número de aparición para filas repetidas; la
+    versión es el hash de todas las columnas, de modo que una fila con la
+    misma identidad pero otros valores (p. ej. más 'Likes') cuenta como
+    modificada.
+
+    Parámetros:
+        df (pd.DataFrame): Datos convertidos, sin la columna 'Sentimiento'.
+
+    Retorna:
+        pd.DataFrame: Columnas '_key', '_version' y '_text_hash'.
+    """
+    version = hash_rows(df)
+    identity = version
+    if "Tweet URL" in df.columns:
+        url = df["Tweet URL"].astype(str).str.strip()
+        has_url = ~url.isin(["", "nan", "None"])
+        identity = version.where(~has_url, hash_rows(url.to_frame()))
+    occurrence = identity.groupby(identity).cumcount()
+    key = hash_rows(pd.DataFrame({"id": identity, "n": occurrence}))
+    text = df["Post Body"].astype(str).to_frame()
+    return pd.DataFrame(
+        {"_key": key, "_version": version, "_text_hash": hash_rows(text)},
+        index=df.index,
+    )
+
+
+def plan_delta(
+    previous: pd.DataFrame | None, keys: pd.DataFrame
+) -> tuple[pd.Series, pd.Series, pd.Series]:
+    """
+    Compara las filas actuales con el análisis guardado.
+
+    Parámetros:
+        previous (pd.DataFrame | None): Filas guardadas del análisis anterior.
+        keys (pd.DataFrame): Salida de row_keys para el archivo actual.
+
+    Retorna:
+        tuple[pd.Series, pd.Series, pd.Series]: Máscara de filas nuevas o
+        modificadas, máscara de filas guardadas que ya no existen (o cambiaron)
+        y etiquetas reutilizables por hash de texto (NaN si hay que clasificar).
+    """
+    if previous is None or previous.empty:
+        added = pd.Series(True, index=keys.index)
+        reused = pd.Series(float("nan"), index=keys.index, dtype=object)
+        return added, pd.Series(dtype=bool), reused
+
+    current = pd.MultiIndex.from_frame(keys[["_key", "_version"]])
+    stored = pd.MultiIndex.from_frame(previous[["_key", "_version"]])
+    added = pd.Series(~current.isin(stored), index=keys.index)
+    removed = pd.Series(~stored.isin(current), index=previous.index)
+
+    labels = previous.drop_duplicates("_text_hash").set_index("_text_hash")
+    reused = keys["_text_hash"].map(labels["Sentimiento"])
+    return added, removed, reused
+
+
+def empty_aggregates() -> dict:
+    """
+    Contadores vacíos de un análisis incremental.
+    """
+    return {
+        name: Counter()
+        for name in [
+            "sentiment_counts",
+            "sentiment_month",
+            "users",
+            "user_rows",
+            "words",
+            "totals",
+            "conteo_tipo_cuenta",
+            "sentimiento_tipo_cuenta",
+        ]
+    }
+
+
+def partial_aggregates(
+    df: pd.DataFrame, stopwords: set = STOPWORDS, tz: str | None = None
+) -> dict:
+    """
+    Calcula contadores combinables de los agregados del dashboard.
+
+    Parámetros:
+        df (pd.DataFrame): Filas clasificadas (con 'Sentimiento').
+        stopwords (set): Palabras excluidas de 'top_words' (STOPWORDS por
+            defecto).
+        tz (str | None): Zona horaria a la que convertir fechas con zona.
+
+    Retorna:
+        dict: Un Counter por agregado; se suman o restan con merge_aggregates.
+    """
+    agg = empty_aggregates()
+    for key in TOTAL_COLUMNS:
+        agg["totals"][key] += 0
+    if df.empty:
+        return agg
+    labels = df["Sentimiento"]
+    agg["sentiment_counts"].update(labels.value_counts().to_dict())
+
+    if "Date" in df.columns:
+        buckets, valid = epoch_buckets(normalize_dates(df["Date"], tz), "month")
+        pairs = zip(buckets[valid].tolist(), labels[valid].tolist())
+        agg["sentiment_month"].update(pairs)
+
+    user_columns = ["Name", "Handle", "Interacciones y Audiencia"]
+    if all(col in df.columns for col in user_columns):
+        users = df.groupby(["Name", "Handle"])["Interacciones y Audiencia"]
+        agg["users"].update({k: int(v) for k, v in users.sum().items()})
+        agg["user_rows"].update(users.size().to_dict())
+
+    agg["totals"].update(column_totals(df))
+    conteo, por_sentimiento = account_type_counts(df)
+    agg["conteo_tipo_cuenta"].update(conteo)
+    for tipo, counts in por_sentimiento.items():
+        for sent, count in counts.items():
+            agg["sentimiento_tipo_cuenta"][(tipo, sent)] += count
+
+    agg["words"].update(top_word_tokens(df["Post Body"], stopwords))
+    return agg
+
+
+def merge_aggregates(total: dict, part: dict, sign: int = 1) -> dict:
+    """
+    Suma (sign=1) o resta (sign=-1) contadores parciales sobre el total.
+    """
+    for name, counter in part.items():
+        target = total.setdefault(name, Counter())
+        for key, value in counter.items():
+            target[key] += sign * value
+            if name in PRUNED and target[key] <= 0:
+                del target[key]
+    return total
+
+
+def render_aggregates(agg: dict) -> dict:
+    """
+    Convierte los contadores al formato 'data' que devuelve /predict-file/.
+
+    No incluye 'post_max_interacciones', que se calcula sobre las filas.
+    """
+    data = {}
+    if agg["user_rows"]:
+        users = [(key, agg["users"][key]) for key in agg["user_rows"]]
+        users.sort(key=lambda item: item[1], reverse=True)
+        data["top_users"] = [
+            {"Name": name, "Handle": handle, "Interacciones y Audiencia": total}
+            for (name, handle), total in users[:10]
+        ]
+
+    month = sorted(agg["sentiment_month"].items())
+    buckets = np.array([bucket for (bucket, _), _ in month], dtype=np.int64)
+    periods = bucket_labels(buckets, "month")
+    data["sentiment_month"] = [
+        {"YearMonth": period, "Sentimiento": label, "Conteo": count}
+        for period, ((_, label), count) in zip(periods, month)
+    ]
+    data["sentiment_counts"] = dict(agg["sentiment_counts"].most_common())
+    for key in TOTAL_COLUMNS:
+        data[key] = agg["totals"][key]
+    data["conteo_tipo_cuenta"] = dict(agg["conteo_tipo_cuenta"])
+    data["sentimiento_tipo_cuenta"] = {
+        tipo: {
+            sent: agg["sentimiento_tipo_cuenta"][(tipo, sent)]
+            for sent in TYPE_SENTIMENTS
+        }
+        for tipo in agg["conteo_tipo_cuenta"]
+    }
+    data["top_words"] = agg["words"].most_common(20)
+    return data
+
+
+class AnalysisStore:
+    """
+    Análisis guardado de un dataset: filas clasificadas y contadores.
+
+    Se guarda en '<root>/<dataset>/state.pkl' como un único pickle con las
+    filas (más sus claves y etiquetas), los contadores y la descripción del
+    clasificador que produjo las etiquetas, de modo que todo se reemplaza
+    junto. lock() serializa el ciclo cargar-actualizar-guardar de
+    un mismo dataset entre hilos y procesos.
+    """
+
+    # Un lock por carpeta de dataset dentro del proceso (flock cubre el resto)
+    _thread_locks = {}
+    _thread_locks_guard = threading.Lock()
+
+    def __init__(self, root: str, dataset: str):
+        if not re.fullmatch(r"[\w.-]+", dataset) or dataset.strip(".") == "":
+            raise ValueError(f"Nombre de dataset inválido: {dataset}")
+        self.path = os.path.join(root, dataset)
+        self.state_path = os.path.join(self.path, "state.pkl")
+
+    @contextmanager
+    def lock(self):
+        """
+        Bloquea el dataset en exclusiva mientras dura el bloque.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        key = os.path.abspath(self.path)
+        with self._thread_locks_guard:
+            thread_lock = self._thread_locks.setdefault(key, threading.Lock())
+        with thread_lock, open(os.path.join(self.path, "lock"), "w") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def load(self) -> tuple[pd.DataFrame | None, dict, dict | None]:
+        """
+        Devuelve las filas, contadores y clasificador guardados (None, vacíos
+        y None si no hay).
+        """
+        if not os.path.exists(self.state_path):
+            return None, empty_aggregates(), None
+        state = pd.read_pickle(self.state_path)
+        return state["rows"], state["aggregates"], state.get("labeler")
+
+    def save(self, rows: pd.DataFrame, aggregates: dict, labeler: dict | None = None):
+        """
+        Reemplaza el análisis guardado por las filas y contadores actuales.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        # Escribe a un archivo temporal y renombra para no dejar estados mixtos
+        tmp_path = self.state_path + ".tmp"
+        state = {"rows": rows, "aggregates": aggregates, "labeler": labeler}
+        pd.to_pickle(state, tmp_path)
+        os.replace(tmp_path, self.state_path)
+
+
+def analyze_delta(
+    df: pd.DataFrame,
+    store: AnalysisStore,
+    classify,
+    stopwords: set = STOPWORDS,
+    tz: str | None = None,
+    labeler: dict | None = None,
+) -> tuple[pd.DataFrame, dict, dict]:
+    """
+    Clasifica solo las filas nuevas o modificadas y actualiza los agregados.
+
+    Si 'labeler' no coincide con el guardado (otro modelo u otro modo de
+    ventanas), las etiquetas anteriores no sirven y se reclasifica todo.
+
+    Parámetros:
+        df (pd.DataFrame): Datos convertidos del archivo completo (acumulado).
+        store (AnalysisStore): Análisis guardado del dataset.
+        classify: Función que recibe una lista de textos y devuelve etiquetas.
+        stopwords (set): Palabras excluidas de 'top_words' (STOPWORDS por
+            defecto).
+        tz (str | None): Zona horaria a la que convertir fechas con zona.
+        labeler (dict | None): Identifica al clasificador (p. ej. modelo y
+            'sliding_window'); se guarda junto a las etiquetas.
+
+    Retorna:
+        tuple[pd.DataFrame, dict, dict]: Filas con 'Sentimiento', agregados en
+        formato 'data' (sin 'post_max_interacciones') y resumen del delta
+        ('reclassified_all' indica que se descartó el análisis anterior).
+    """
+    with store.lock():
+        previous, aggregates, stored_labeler = store.load()
+        reclassify_all = previous is not None and stored_labeler != labeler
+        if reclassify_all:
+            previous, aggregates = None, empty_aggregates()
+        keys = row_keys(df)
+        added, removed, reused = plan_delta(previous, keys)
+
+        pending = reused.isna()
+        df["Sentimiento"] = reused
+        if pending.any():
+            textos = df.loc[pending, "Post Body"].tolist()
+            df.loc[pending, "Sentimiento"] = classify(textos)
+
+        if previous is not None and removed.any():
+            old = previous.loc[removed].drop(columns=KEY_COLUMNS)
+            merge_aggregates(aggregates, partial_aggregates(old, stopwords, tz), -1)
+        merge_aggregates(
+            aggregates, partial_aggregates(df.loc[added], stopwords, tz), 1
+        )
+        store.save(pd.concat([df, keys], axis=1), aggregates, labeler)
+
+    delta = {
+        "new_rows": int(added.sum()),
+        "removed_rows": int(removed.sum()),
+        "classified_rows": int(pending.sum()),
+        "reclassified_all": reclassify_all,
+    }
+    return df, render_aggregates(aggregates), delta
@@ -1,13 +1,26 @@
 from dotenv import load_dotenv
+import base64
+import hmac
 import io
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from pydantic import BaseModel
-from transformers import BertTokenizer, BertForSequenceClassification
+from fastapi import FastAPI, Header, HTTPException, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, ValidationError
 import torch
+import numpy as np
 import pandas as pd
-import re
+import xlsxwriter
 from collections import Counter
 import os
+from zoneinfo import ZoneInfo
+from admission import BULK, INTERACTIVE, Lane, PriorityGate
+from aggregates import account_type_counts, column_totals, top_word_tokens
+from incremental import AnalysisStore, analyze_delta
+from registry import ModelRegistry
+from sketches import DashboardSketch
+from timeseries import month_records, parse_granularities, sentiment_series
 
 load_dotenv()
 
@@ -19,50 +32,293 @@ if not HUGGINGFACE_MODEL_ID or not HF_TOKEN:
         "Las variables de entorno HUGGINGFACE_MODEL_ID y HF_TOKEN deben estar definidas."
     )
 
-tokenizer = BertTokenizer.from_pretrained(HUGGINGFACE_MODEL_ID)
-model = BertForSequenceClassification.from_pretrained(HUGGINGFACE_MODEL_ID)
+# Modelos servidos por el proceso; el de HUGGINGFACE_MODEL_ID es el por defecto
+DEFAULT_MODEL_NAME = os.getenv("DEFAULT_MODEL_NAME", "default")
+registry = ModelRegistry()
+registry.load(DEFAULT_MODEL_NAME, HUGGINGFACE_MODEL_ID, make_default=True)
+
+# Token que exigen los endpoints /models que modifican el registro; si no está
+# definido, esos endpoints quedan deshabilitados
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 
 app = FastAPI()
+# Comprime las respuestas grandes (predicciones y agregados de archivos)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 
 class TextInput(BaseModel):
     text: str
+    sliding_window: bool = True
+    model: str | None = None
+
+
+class BatchInput(BaseModel):
+    texts: list[str]
+    ids: list[str | int] | None = None
+    sliding_window: bool = True
+    return_indices: bool = False
+    return_probabilities: bool = False
+    model: str | None = None
 
 
-MAX_TEXT_LENGTH = 512
+class ModelLoadInput(BaseModel):
+    name: str
+    model_id: str
+    make_default: bool = False
+
+
+# Límite de seguridad en caracteres; los textos largos se dividen en ventanas
+MAX_TEXT_LENGTH = 20000
 
 LABELS = {0: "negativo", 1: "neutro", 2: "positivo"}
 
+# Diccionario de la codificación compacta de predicciones (índice = código uint8)
+LABEL_DICTIONARY = [*LABELS.values(), "desconocido"]
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Filas por hoja de Excel (incluida la fila de encabezados)
+EXCEL_MAX_ROWS = 1048576
+
+# Parámetros del motor de inferencia por lotes
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "32"))
+MAX_TOKENS = 512
+WINDOW_STRIDE = int(os.getenv("WINDOW_STRIDE", "128"))
+
+# Carpeta donde se guardan los análisis incrementales (/predict-file-incremental/)
+ANALYSIS_STORE_DIR = os.getenv("ANALYSIS_STORE_DIR", "analyses")
+
+# Filas por bloque al actualizar los resúmenes del modo aproximado
+SKETCH_CHUNK_ROWS = int(os.getenv("SKETCH_CHUNK_ROWS", "50000"))
+
+# Zona horaria a la que se convierten las fechas con zona antes de agrupar
+TIMEZONE = os.getenv("TIMEZONE") or None
+
+# Límites del endpoint /predict-batch
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "1000"))
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", str(1024 * 1024)))
+# Tamaño máximo del cuerpo JSON; deja margen para el escapado (\uXXXX) y 'ids'
+MAX_BATCH_BODY_BYTES = int(
+    os.getenv("MAX_BATCH_BODY_BYTES", str(4 * MAX_BATCH_BYTES))
+)
+
+# Control de admisión: /predict es interactivo; los lotes y archivos, masivos
+INTERACTIVE_LANE = Lane(
+    "interactive",
+    INTERACTIVE,
+    concurrency=int(os.getenv("INTERACTIVE_CONCURRENCY", "4")),
+    queue_size=int(os.getenv("INTERACTIVE_QUEUE", "32")),
+    max_wait=float(os.getenv("INTERACTIVE_MAX_WAIT", "5")),
+    retry_after=1,
+)
+BULK_LANE = Lane(
+    "bulk",
+    BULK,
+    concurrency=int(os.getenv("BULK_CONCURRENCY", "1")),
+    queue_size=int(os.getenv("BULK_QUEUE", "4")),
+    max_wait=float(os.getenv("BULK_MAX_WAIT", "300")),
+    retry_after=30,
+)
+# Pasadas simultáneas del modelo; cada lote de ventanas ocupa un cupo
+MODEL_GATE = PriorityGate(int(os.getenv("MODEL_SLOTS", "1")))
+
+
+def split_windows(
+    ids: list[int], sliding_window: bool = True, entry=None
+) -> list[list[int]]:
+    """
+    Divide una secuencia de tokens en ventanas solapadas que caben en el modelo.
+
+    Parámetros:
+        ids (list[int]): Tokens del texto sin tokens especiales.
+        sliding_window (bool): Si es False, solo se conserva la primera ventana
+            (equivalente a truncar).
+        entry (LoadedModel | None): Modelo a usar (por defecto el del registro).
+
+    Retorna:
+        list[list[int]]: Ventanas de como máximo MAX_TOKENS tokens (contando
+        los especiales), solapadas en WINDOW_STRIDE tokens.
+    """
+    tokenizer = (entry or registry.get()).tokenizer
+    max_tokens = min(tokenizer.model_max_length, MAX_TOKENS)
+    size = max_tokens - tokenizer.num_special_tokens_to_add()
+    if not sliding_window or len(ids) <= size:
+        return [ids[:size]]
+    step = max(size - WINDOW_STRIDE, 1)
+    windows = []
+    for start in range(0, len(ids), step):
+        windows.append(ids[start : start + size])
+        if start + size >= len(ids):
+            break
+    return windows
+
+
+def run_batches(windows: list[list[int]], entry=None) -> torch.Tensor:
+    """
+    Ejecuta el modelo sobre todas las ventanas agrupándolas en lotes.
+
+    Las ventanas se ordenan por longitud para minimizar el relleno de cada lote.
+    Cada lote espera un cupo de MODEL_GATE, que atiende antes a las peticiones
+    interactivas que a las masivas.
+
+    Parámetros:
+        windows (list[list[int]]): Ventanas de tokens sin tokens especiales.
+        entry (LoadedModel | None): Modelo a usar (por defecto el del registro).
+
+    Retorna:
+        torch.Tensor: Logits de cada ventana, en el mismo orden de entrada.
+    """
+    entry = entry or registry.get()
+    tokenizer, model = entry.tokenizer, entry.model
+    logits = torch.empty((len(windows), model.config.num_labels))
+    order = sorted(range(len(windows)), key=lambda i: len(windows[i]))
+    for start in range(0, len(order), BATCH_SIZE):
+        idx = order[start : start + BATCH_SIZE]
+        batch = [tokenizer.build_inputs_with_special_tokens(windows[i]) for i in idx]
+        width = max(len(ids) for ids in batch)
+        input_ids = torch.full(
+            (len(batch), width), tokenizer.pad_token_id, dtype=torch.long
+        )
+        attention_mask = torch.zeros((len(batch), width), dtype=torch.long)
+        for row, ids in enumerate(batch):
+            input_ids[row, : len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, : len(ids)] = 1
+        with MODEL_GATE.slot(), torch.no_grad():
+            outputs = model(input_ids=input_ids, attention_mask=attention_mask)
+        logits[idx] = outputs.logits.float()
+    return logits
+
+
+def predict_logits(
+    texts: list, sliding_window: bool = True, model_name: str | None = None
+) -> torch.Tensor:
+    """
+    Calcula los logits por documento para una lista de textos.
+
+    Cada texto se divide en ventanas, todas las ventanas de todos los textos
+    pasan juntas por el motor de lotes y los logits de un mismo documento se
+    promedian ponderando por el número de tokens de cada ventana.
+
+    Parámetros:
+        texts (list): Textos a analizar; los vacíos o no textuales se ignoran.
+        sliding_window (bool): Usa ventanas deslizantes en lugar de truncar.
+        model_name (str | None): Modelo del registro (por defecto el principal).
+            Todo el lote usa el mismo modelo aunque se cambie durante la petición.
+
+    Retorna:
+        torch.Tensor: Matriz (len(texts), num_labels); las filas de textos
+        ignorados contienen NaN.
+    """
+    entry = registry.get(model_name)
+    num_labels = entry.model.config.num_labels
+    doc_logits = torch.full((len(texts), num_labels), float("nan"))
+    valid = [
+        i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()
+    ]
+    if not valid:
+        return doc_logits
+
+    encoded = entry.tokenizer(
+        [texts[i] for i in valid],
+        add_special_tokens=False,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+        verbose=False,
+    )["input_ids"]
+    windows = []
+    owners = []
+    for doc, ids in zip(valid, encoded):
+        for window in split_windows(ids, sliding_window, entry):
+            windows.append(window)
+            owners.append(doc)
+
+    logits = run_batches(windows, entry)
+    owner = torch.tensor(owners, dtype=torch.long)
+    weights = torch.tensor([max(len(w), 1) for w in windows], dtype=torch.float)
+    sums = torch.zeros_like(doc_logits).index_add_(0, owner, logits * weights[:, None])
+    totals = torch.zeros(len(texts)).index_add_(0, owner, weights)
+    doc_logits[valid] = sums[valid] / totals[valid, None]
+    return doc_logits
+
 
-def predict_label(text: str) -> str:
+def labels_from_logits(doc_logits: torch.Tensor) -> list[str]:
+    """
+    Convierte logits por documento en etiquetas de sentimiento.
+
+    Parámetros:
+        doc_logits (torch.Tensor): Salida de predict_logits.
+
+    Retorna:
+        list[str]: Etiquetas ('negativo', 'neutro', 'positivo' o 'desconocido').
+    """
+    predicted = torch.argmax(torch.nan_to_num(doc_logits, nan=0.0), dim=1).tolist()
+    missing = torch.isnan(doc_logits).any(dim=1).tolist()
+    return [
+        "desconocido" if skip else LABELS.get(int(cls), "desconocido")
+        for cls, skip in zip(predicted, missing)
+    ]
+
+
+def predict_labels(
+    texts: list, sliding_window: bool = True, model_name: str | None = None
+) -> list[str]:
+    """
+    Realiza la inferencia de sentimiento por lotes sobre una lista de textos.
+
+    Parámetros:
+        texts (list): Textos a analizar.
+        sliding_window (bool): Usa ventanas deslizantes para textos largos.
+        model_name (str | None): Modelo del registro (por defecto el principal).
+
+    Retorna:
+        list[str]: Etiqueta predicha por texto ('desconocido' si está vacío).
+    """
+    return labels_from_logits(predict_logits(texts, sliding_window, model_name))
+
+
+def predict_label(
+    text: str, sliding_window: bool = True, model_name: str | None = None
+) -> str:
     """
     Realiza la inferencia de sentimiento sobre un texto dado.
 
     Parámetros:
         text (str): Texto a analizar.
+        sliding_window (bool): Usa ventanas deslizantes para textos largos.
+        model_name (str | None): Modelo del registro (por defecto el principal).
 
     Retorna:
         str: Etiqueta predicha ('negativo', 'neutro', 'positivo' o 'desconocido').
     """
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-    with torch.no_grad():
-        outputs = model(**inputs)
-        logits = outputs.logits
-        predicted_class = torch.argmax(logits, dim=1).item()
-    return LABELS.get(int(predicted_class), "desconocido")
+    return predict_labels([text], sliding_window, model_name)[0]
+
+
+def check_model(name: str | None):
+    """
+    Verifica que el modelo solicitado esté cargado (404 si no lo está).
+    """
+    try:
+        registry.get(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Modelo no encontrado: {name}")
 
 
 @app.post("/predict")
-def predict(input: TextInput):
+async def predict(input: TextInput):
     """
     Endpoint para predecir el sentimiento de un texto recibido en formato JSON.
 
     Parámetros:
-        input (TextInput): Objeto con el campo 'text' (str).
+        input (TextInput): Objeto con el campo 'text' (str) y, opcionalmente,
+            'sliding_window' (bool) para analizar textos largos por ventanas y
+            'model' (str) para elegir un modelo del registro.
 
     Retorna:
         dict: Diccionario con la predicción ('prediction').
+
+    Usa el carril interactivo: si está saturado responde 429 o 503 con
+    Retry-After.
     """
     if not input.text or len(input.text.strip()) == 0:
         raise HTTPException(status_code=400, detail="El texto no puede estar vacío.")
@@ -71,29 +327,224 @@ def predict(input: TextInput):
             status_code=400,
             detail=f"El texto no puede exceder {MAX_TEXT_LENGTH} caracteres.",
         )
+    check_model(input.model)
+    async with INTERACTIVE_LANE.admit():
+        try:
+            label = await run_in_threadpool(
+                predict_label, input.text, input.sliding_window, input.model
+            )
+            return {"prediction": label}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+async def read_body_limited(request: Request, limit: int) -> bytes:
+    """
+    Lee el cuerpo de la petición respondiendo 413 en cuanto supera 'limit'.
+
+    Se rechaza primero por Content-Length y, si no viene o miente, al leer el
+    flujo, de modo que un cuerpo demasiado grande nunca se carga ni se parsea
+    completo.
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"El cuerpo de la petición no puede exceder {limit} bytes.",
+    )
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+@app.post(
+    "/predict-batch",
+    response_class=ORJSONResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": BatchInput.model_json_schema()}
+            },
+            "required": True,
+        }
+    },
+)
+async def predict_batch(request: Request):
+    """
+    Endpoint para predecir el sentimiento de una lista de textos en un solo lote.
+
+    Parámetros:
+        request (Request): Cuerpo JSON con la forma de BatchInput: 'texts'
+            (list[str]) y, opcionalmente, 'ids' (misma longitud que 'texts'),
+            'sliding_window', 'model', 'return_indices' y
+            'return_probabilities'.
+
+    Retorna:
+        dict: Diccionario con las etiquetas ('labels') en el orden de entrada y,
+        si se solicitan, 'ids', 'label_indices' (-1 para 'desconocido') y
+        'probabilities' (None para textos vacíos).
+
+    Usa el carril masivo (429 o 503 con Retry-After si está saturado). El
+    cuerpo se limita a MAX_BATCH_BODY_BYTES antes de parsearlo.
+    """
+    body = await read_body_limited(request, MAX_BATCH_BODY_BYTES)
+    try:
+        input = BatchInput.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    if not input.texts:
+        raise HTTPException(status_code=400, detail="La lista de textos está vacía.")
+    if len(input.texts) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote no puede exceder {MAX_BATCH_ITEMS} textos.",
+        )
+    if sum(len(text.encode("utf-8")) for text in input.texts) > MAX_BATCH_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote no puede exceder {MAX_BATCH_BYTES} bytes de texto.",
+        )
+    if input.ids is not None and len(input.ids) != len(input.texts):
+        raise HTTPException(
+            status_code=400,
+            detail="La lista 'ids' debe tener la misma longitud que 'texts'.",
+        )
+    check_model(input.model)
+    async with BULK_LANE.admit():
+        try:
+            doc_logits = await run_in_threadpool(
+                predict_logits, input.texts, input.sliding_window, input.model
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    labels = labels_from_logits(doc_logits)
+    result = {"labels": labels}
+    if input.ids is not None:
+        result["ids"] = input.ids
+    missing = torch.isnan(doc_logits).any(dim=1).tolist()
+    if input.return_indices:
+        indices = torch.argmax(torch.nan_to_num(doc_logits, nan=0.0), dim=1).tolist()
+        result["label_indices"] = [
+            -1 if skip else idx for idx, skip in zip(indices, missing)
+        ]
+    if input.return_probabilities:
+        probs = torch.softmax(doc_logits, dim=1).round(decimals=4).tolist()
+        result["probabilities"] = [
+            None if skip else row for row, skip in zip(probs, missing)
+        ]
+    # Devolver la respuesta directamente evita que FastAPI recorra el resultado
+    # con jsonable_encoder antes de serializarlo con orjson
+    return ORJSONResponse(result)
+
+
+def read_excel_fast(source, sheet=None, columns=None, **kwargs) -> pd.DataFrame:
+    """
+    Lee un libro Excel con el motor más rápido disponible.
+
+    Usa el motor ``calamine`` (implementado en Rust) cuando está instalado y,
+    si no, el motor por defecto de pandas (openpyxl en modo solo lectura).
+
+    Parámetros:
+        source: Ruta, bytes en memoria o archivo abierto.
+        sheet (str | int | None): Nombre o índice de la hoja (por defecto la primera).
+        columns (list[str] | None): Columnas a conservar; la hoja se lee
+            completa y el resto se descarta al construir el DataFrame.
+        **kwargs: Argumentos adicionales para ``pd.read_excel``.
+
+    Retorna:
+        pd.DataFrame: Contenido de la hoja seleccionada.
+    """
+    if sheet is None or sheet == "":
+        sheet = 0
+    elif isinstance(sheet, str) and sheet.isdigit():
+        sheet = int(sheet)
+    if columns:
+        wanted = {col.strip() for col in columns}
+        kwargs["usecols"] = lambda col: str(col).strip() in wanted
     try:
-        label = predict_label(input.text)
-        return {"prediction": label}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return pd.read_excel(source, sheet_name=sheet, engine="calamine", **kwargs)
+    except ImportError:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return pd.read_excel(source, sheet_name=sheet, **kwargs)
+
+
+def parse_columns(columns: str | None) -> list[str] | None:
+    """
+    Convierte el parámetro de consulta 'columns' (separado por comas) en lista.
+    """
+    if not columns:
+        return None
+    return [col.strip() for col in columns.split(",") if col.strip()]
+
+
+def read_table(
+    filename: str | None, contents: bytes, sheet=None, columns=None
+) -> pd.DataFrame:
+    """
+    Lee un archivo CSV o Excel subido y limpia los nombres de sus columnas.
+
+    Parámetros:
+        filename (str | None): Nombre del archivo, usado para detectar el formato.
+        contents (bytes): Contenido del archivo.
+        sheet (str | int | None): Hoja a leer en archivos Excel.
+        columns (list[str] | None): Columnas a leer; 'Post Body' siempre se incluye.
+
+    Retorna:
+        pd.DataFrame: Datos leídos.
+    """
+    if columns:
+        columns = list(dict.fromkeys(list(columns) + ["Post Body"]))
+    try:
+        if filename and filename.endswith(".csv"):
+            usecols = None
+            if columns:
+                wanted = set(columns)
+                usecols = lambda col: str(col).strip() in wanted  # noqa: E731
+            df = pd.read_csv(
+                io.BytesIO(contents),
+                keep_default_na=False,
+                na_filter=False,
+                usecols=usecols,
+            )
+        elif filename and filename.endswith((".xls", ".xlsx")):
+            df = read_excel_fast(io.BytesIO(contents), sheet=sheet, columns=columns)
+        else:
+            raise HTTPException(
+                status_code=400, detail="Formato de archivo no soportado."
+            )
+
+        # Limpia los nombres de las columnas
+        df.columns = df.columns.str.strip()
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="No se pudo leer el archivo.")
+    return df
 
 
 @app.post("/read-file/")
-async def read_file(file: UploadFile = File(...)):
+async def read_file(file: UploadFile = File(...), sheet: str | None = None):
     """
     Endpoint para leer un archivo CSV o Excel y devolver sus columnas.
 
     Parámetros:
         file (UploadFile): Archivo subido por el usuario (.csv, .xls, .xlsx).
+        sheet (str | None): Hoja a leer en archivos Excel (nombre o índice).
 
     Retorna:
         dict: Diccionario con la lista de columnas ('columns').
     """
     try:
         if file.filename and file.filename.endswith(".csv"):
-            df = pd.read_csv(file.file)
+            df = pd.read_csv(file.file, nrows=0)
         elif file.filename and file.filename.endswith((".xls", ".xlsx")):
-            df = pd.read_excel(file.file)
+            df = read_excel_fast(file.file, sheet=sheet, nrows=0)
         else:
             raise HTTPException(
                 status_code=400, detail="Formato de archivo no soportado."
@@ -104,29 +555,16 @@ async def read_file(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/predict-file/")
-async def predict_file(file: UploadFile = File(...)):
+def convert_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Analiza el archivo, predice sentimientos y prepara datos para gráficas.
-    """
-    contents = await file.read()
-    try:
-        if file.filename and file.filename.endswith(".csv"):
-            df = pd.read_csv(
-                io.BytesIO(contents), keep_default_na=False, na_filter=False
-            )
-        elif file.filename and file.filename.endswith((".xls", ".xlsx")):
-            df = pd.read_excel(io.BytesIO(contents))
-        else:
-            raise HTTPException(
-                status_code=400, detail="Formato de archivo no soportado."
-            )
+    Convierte las columnas conocidas del export a sus tipos esperados.
 
-        # Limpia los nombres de las columnas
-        df.columns = df.columns.str.strip()
-    except Exception:
-        raise HTTPException(status_code=400, detail="No se pudo leer el archivo.")
+    Parámetros:
+        df (pd.DataFrame): Datos leídos del archivo.
 
+    Retorna:
+        pd.DataFrame: El mismo DataFrame con los tipos convertidos.
+    """
     # Conversión de tipos de columnas
     int_columns = [
         "Retweets",
@@ -166,28 +604,85 @@ async def predict_file(file: UploadFile = File(...)):
     for col in ["Institucionales", "Medios de Comunicación", "General", "Bots"]:
         if col in df.columns:
             df[col] = df[col].replace("", 0).fillna(0)
+    return df
 
-    # Predecir sentimientos
-    if "Post Body" not in df.columns:
-        raise HTTPException(
-            status_code=400, detail="El archivo no contiene la columna 'Post Body'."
-        )
-    textos = df["Post Body"].tolist()
-    results = []
-    for text in textos:
-        if isinstance(text, str) and text.strip():
-            label = predict_label(text)
-        else:
-            label = "desconocido"
-        results.append(label)
-    df["Sentimiento"] = results
 
-    # Prepara datos para gráficas
-    columns = df.columns.tolist()
+def post_max_interacciones(df: pd.DataFrame) -> dict:
+    """
+    Devuelve los campos del post con más 'Interacciones y Audiencia'.
+
+    Parámetros:
+        df (pd.DataFrame): Datos clasificados con 'Interacciones y Audiencia'.
+
+    Retorna:
+        dict: Campos solicitados del post, con fecha 'dd/mm/AAAA' y sin nulos.
+    """
+    idx_max = df["Interacciones y Audiencia"].idxmax()
+    post_max = df.loc[idx_max].to_dict()
+    campos = [
+        "Name",
+        "Handle",
+        "Retweets",
+        "Likes",
+        "Comments",
+        "Views",
+        "Post Body",
+        "Timestamp",
+        "Sentimiento",
+    ]
+    post_filtrado = {}
+    for campo in campos:
+        if campo in post_max:
+            if campo == "Timestamp" and pd.notna(post_max[campo]):
+                try:
+                    fecha = pd.to_datetime(post_max[campo])
+                    post_filtrado[campo] = fecha.strftime("%d/%m/%Y")
+                except Exception:
+                    post_filtrado[campo] = str(post_max[campo])
+            else:
+                post_filtrado[campo] = post_max[campo]
+    for k, v in post_filtrado.items():
+        if pd.isna(v) or v in [float("inf"), float("-inf")]:
+            post_filtrado[k] = ""
+    return post_filtrado
+
+
+def build_dashboard_data(
+    df: pd.DataFrame,
+    granularities: list[str] | None = None,
+    rolling: int | None = None,
+    per_handle: bool = False,
+    tz: str | None = TIMEZONE,
+    approximate: bool = False,
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Calcula los agregados del dashboard sobre un DataFrame ya clasificado.
+
+    Parámetros:
+        df (pd.DataFrame): Datos con la columna 'Sentimiento'.
+        granularities (list[str] | None): Granularidades adicionales ('hour',
+            'day', 'week', 'month') para 'sentiment_series'.
+        rolling (int | None): Ventana (en buckets) de las proporciones móviles.
+        per_handle (bool): Calcula también series por 'Handle'.
+        tz (str | None): Zona horaria a la que convertir fechas con zona.
+        approximate (bool): Calcula 'top_users' y 'top_words' con resúmenes de
+            memoria acotada y añade usuarios distintos y posts de ejemplo.
+
+    Retorna:
+        tuple[pd.DataFrame, dict]: El DataFrame limpio para serializar (sin
+        zonas horarias ni valores nulos) y el diccionario de agregados.
+    """
     data = {}
 
+    # Modo aproximado: resúmenes de memoria fija actualizados por bloques
+    if approximate:
+        sketch = DashboardSketch()
+        for start in range(0, len(df), SKETCH_CHUNK_ROWS):
+            sketch.update(df.iloc[start : start + SKETCH_CHUNK_ROWS])
+        sketch.render(data)
+
     # 1. Top 10 usuarios con mayor Interacciones y Audiencia
-    if all(
+    if not approximate and all(
         col in df.columns for col in ["Name", "Handle", "Interacciones y Audiencia"]
     ):
         top_users = (
@@ -199,13 +694,25 @@ async def predict_file(file: UploadFile = File(...)):
         )
         data["top_users"] = top_users.to_dict(orient="records")
 
-    # 2. Lineplot de conteo de sentimientos por mes y año
+    # 2. Lineplot de conteo de sentimientos por mes y año (y otras granularidades)
     if "Sentimiento" in df.columns and "Date" in df.columns:
-        df["YearMonth"] = df["Date"].dt.to_period("M").astype(str)
-        sentiment_month = (
-            df.groupby(["YearMonth", "Sentimiento"]).size().reset_index(name="Conteo")
+        granularities = granularities or []
+        keys = df["Handle"] if per_handle and "Handle" in df.columns else None
+        series = sentiment_series(
+            df["Date"],
+            df["Sentimiento"],
+            list(dict.fromkeys(["month", *granularities])),
+            keys=keys,
+            window=rolling,
+            tz=tz,
         )
-        data["sentiment_month"] = sentiment_month.to_dict(orient="records")
+        data["sentiment_month"] = month_records(series["series"]["month"])
+        if granularities or rolling:
+            data["sentiment_series"] = {
+                gran: series["series"][gran] for gran in granularities or ["month"]
+            }
+        if keys is not None:
+            data["sentiment_series_handles"] = series["by_key"]
 
     # 3. Conteo de sentimientos para gráfico de pastel
     if "Sentimiento" in df.columns:
@@ -213,42 +720,11 @@ async def predict_file(file: UploadFile = File(...)):
         data["sentiment_counts"] = sentiment_counts.to_dict()
 
     # Estadísticas generales
-    data["total_retweets"] = (
-        int(df["Retweets"].sum()) if "Retweets" in df.columns else 0
-    )
-    data["total_likes"] = int(df["Likes"].sum()) if "Likes" in df.columns else 0
-    data["total_views"] = int(df["Views"].sum()) if "Views" in df.columns else 0
-    data["total_comments"] = (
-        int(df["Comments"].sum()) if "Comments" in df.columns else 0
-    )
+    data.update(column_totals(df))
 
     # Post con más Interacciones y Audiencia (solo los campos solicitados)
     if "Interacciones y Audiencia" in df.columns:
-        idx_max = df["Interacciones y Audiencia"].idxmax()
-        post_max = df.loc[idx_max].to_dict()
-        campos = [
-            "Name",
-            "Handle",
-            "Retweets",
-            "Likes",
-            "Comments",
-            "Views",
-            "Post Body",
-            "Timestamp",
-            "Sentimiento",
-        ]
-        post_filtrado = {}
-        for campo in campos:
-            if campo in post_max:
-                if campo == "Timestamp" and pd.notna(post_max[campo]):
-                    try:
-                        fecha = pd.to_datetime(post_max[campo])
-                        post_filtrado[campo] = fecha.strftime("%d/%m/%Y")
-                    except Exception:
-                        post_filtrado[campo] = str(post_max[campo])
-                else:
-                    post_filtrado[campo] = post_max[campo]
-        data["post_max_interacciones"] = post_filtrado
+        data["post_max_interacciones"] = post_max_interacciones(df)
 
     # Quita la zona horaria de todas las columnas datetime64
     for col in df.select_dtypes(include=["datetimetz"]).columns:
@@ -257,235 +733,416 @@ async def predict_file(file: UploadFile = File(...)):
     df = df.replace([float("inf"), float("-inf")], float("nan"))
     df = df.fillna("")
 
-    if "post_max_interacciones" in data:
-        for k, v in data["post_max_interacciones"].items():
-            if pd.isna(v) or v in [float("inf"), float("-inf")]:
-                data["post_max_interacciones"][k] = ""
-
-    # Conteo total de cada tipo de cuenta
-    conteo_tipo_cuenta = {}
-    for col in ["Institucionales", "Medios de Comunicación", "General", "Bots"]:
-        if col in df.columns:
-            conteo_tipo_cuenta[col] = int(df[col].sum())
+    # Conteo por tipo de cuenta y sentimiento por tipo (stacked bar chart)
+    conteo_tipo_cuenta, sentimiento_tipo_cuenta = account_type_counts(df)
     data["conteo_tipo_cuenta"] = conteo_tipo_cuenta
-
-    # Sentimiento por tipo de cuenta (estructura para stacked bar chart)
-    tipos = ["Institucionales", "Medios de Comunicación", "General", "Bots"]
-    sentimientos = ["positivo", "negativo", "neutro"]
-    sentimiento_tipo_cuenta = {}
-
-    for tipo in tipos:
-        if tipo in df.columns:
-            cuenta = {}
-            for sent in sentimientos:
-                cuenta[sent] = int(
-                    df[(df[tipo] > 0) & (df["Sentimiento"] == sent)].shape[0]
-                )
-            sentimiento_tipo_cuenta[tipo] = cuenta
-
     data["sentimiento_tipo_cuenta"] = sentimiento_tipo_cuenta
 
     # Palabras más frecuentes en "Post Body"
-    if "Post Body" in df.columns:
-        # Une todos los textos en uno solo
-        all_text = " ".join(df["Post Body"].dropna().astype(str)).lower()
-        # Elimina signos de puntuación y separa por palabras
-        words = re.findall(r"\b\w+\b", all_text)
-        # Puedes excluir stopwords si lo deseas
-        stopwords = set(
-            [
-                "de",
-                "la",
-                "que",
-                "el",
-                "en",
-                "y",
-                "a",
-                "los",
-                "del",
-                "se",
-                "las",
-                "por",
-                "un",
-                "para",
-                "con",
-                "no",
-                "una",
-                "su",
-                "al",
-                "es",
-                "lo",
-                "como",
-                "más",
-                "pero",
-                "sus",
-                "le",
-                "ya",
-                "o",
-                "este",
-                "sí",
-                "porque",
-                "esta",
-                "entre",
-                "cuando",
-                "muy",
-                "sin",
-                "sobre",
-                "también",
-                "me",
-                "hasta",
-                "hay",
-                "donde",
-                "quien",
-                "desde",
-                "todo",
-                "nos",
-                "durante",
-                "todos",
-                "uno",
-                "les",
-                "ni",
-                "contra",
-                "otros",
-                "ese",
-                "eso",
-                "ante",
-                "ellos",
-                "e",
-                "esto",
-                "mí",
-                "antes",
-                "algunos",
-                "qué",
-                "unos",
-                "yo",
-                "otro",
-                "otras",
-                "otra",
-                "él",
-                "tanto",
-                "esa",
-                "estos",
-                "mucho",
-                "quienes",
-                "nada",
-                "muchos",
-                "cual",
-                "poco",
-                "ella",
-                "estar",
-                "estas",
-                "algunas",
-                "algo",
-                "nosotros",
-                "mi",
-                "mis",
-                "tú",
-                "te",
-                "ti",
-                "tu",
-                "tus",
-                "ellas",
-                "nosotras",
-                "vosotros",
-                "vosotras",
-                "os",
-                "mío",
-                "mía",
-                "míos",
-                "mías",
-                "tuyo",
-                "tuya",
-                "tuyos",
-                "tuyas",
-                "suyo",
-                "suya",
-                "suyos",
-                "suyas",
-                "nuestro",
-                "nuestra",
-                "nuestros",
-                "nuestras",
-                "vuestro",
-                "vuestra",
-                "vuestros",
-                "vuestras",
-                "esos",
-                "esas",
-                "estoy",
-                "estás",
-                "está",
-                "estamos",
-                "estáis",
-                "están",
-                "esté",
-                "estés",
-                "estemos",
-                "estéis",
-                "estén",
-                "estaré",
-                "estarás",
-                "estará",
-                "estaremos",
-                "estaréis",
-                "estarán",
-                "estaría",
-                "estarías",
-                "estaríamos",
-                "estaríais",
-                "estarían",
-                "estaba",
-                "estabas",
-                "estábamos",
-                "estabais",
-                "estaban",
-                "estuve",
-                "estuviste",
-                "estuvo",
-                "estuvimos",
-                "estuvisteis",
-                "estuvieron",
-                "estuviera",
-                "estuvieras",
-                "estuviéramos",
-                "estuvierais",
-                "estuvieran",
-                "estuviese",
-                "estuvieses",
-                "estuviésemos",
-                "estuvieseis",
-                "estuviesen",
-                "estando",
-                "estado",
-                "estada",
-                "estados",
-                "estadas",
-                "estad",
-                "http",
-                "https",
-                "www",
-                "com",
-                "co",
-                "org",
-                "net",
-                "es",
-                "bin",
-                "bit",
-                "cada",
-                "asi",
-                "así",
-                "solo",
-                "sólo",
-                "si",
-                "tras",
-            ]
-        )
-        filtered_words = [w for w in words if w not in stopwords and len(w) > 2]
+    if not approximate and "Post Body" in df.columns:
+        filtered_words = top_word_tokens(df["Post Body"])
         word_counts = Counter(filtered_words).most_common(20)  # Top 20
         data["top_words"] = word_counts
 
+    return df, data
+
+
+def analyze_table(
+    df: pd.DataFrame,
+    sliding_window: bool = True,
+    model_name: str | None = None,
+    **options,
+) -> tuple[pd.DataFrame, dict, list]:
+    """
+    Convierte tipos, predice sentimientos y calcula los agregados de un archivo.
+
+    Parámetros:
+        df (pd.DataFrame): Datos leídos del archivo.
+        sliding_window (bool): Usa ventanas deslizantes para textos largos.
+        model_name (str | None): Modelo del registro (por defecto el principal).
+        **options: Opciones de build_dashboard_data (series temporales, modo
+            aproximado).
+
+    Retorna:
+        tuple[pd.DataFrame, dict, list]: DataFrame anotado, agregados del
+        dashboard y lista de columnas originales más 'Sentimiento'.
+    """
+    df = convert_columns(df)
+
+    # Predecir sentimientos
+    if "Post Body" not in df.columns:
+        raise HTTPException(
+            status_code=400, detail="El archivo no contiene la columna 'Post Body'."
+        )
+    textos = df["Post Body"].tolist()
+    df["Sentimiento"] = predict_labels(textos, sliding_window, model_name)
+
+    columns = df.columns.tolist()
+    df, data = build_dashboard_data(df, **options)
+    return df, data, columns
+
+
+def label_codes(labels) -> np.ndarray:
+    """
+    Códigos uint8 de las etiquetas (índices en LABEL_DICTIONARY).
+
+    Las etiquetas fuera del diccionario se tratan como 'desconocido'.
+    """
+    codes = pd.Categorical(labels, categories=LABEL_DICTIONARY).codes
+    return np.where(codes < 0, len(LABEL_DICTIONARY) - 1, codes).astype(np.uint8)
+
+
+def encode_labels(labels: pd.Series) -> dict:
+    """
+    Codifica las etiquetas como un arreglo uint8 en base64 más su diccionario.
+
+    Parámetros:
+        labels (pd.Series): Etiqueta de sentimiento de cada fila.
+
+    Retorna:
+        dict: {'dictionary': etiquetas, 'dtype': 'uint8', 'codes': base64};
+        el código i de cada fila corresponde a dictionary[i].
+    """
+    codes = label_codes(labels)
     return {
-        "predicciones": df["Sentimiento"].tolist(),
+        "dictionary": LABEL_DICTIONARY,
+        "dtype": "uint8",
+        "codes": base64.b64encode(codes.tobytes()).decode("ascii"),
+    }
+
+
+def decode_labels(encoded: dict) -> list[str]:
+    """
+    Decodifica la salida de encode_labels a una lista de etiquetas.
+    """
+    codes = np.frombuffer(base64.b64decode(encoded["codes"]), dtype=np.uint8)
+    return [encoded["dictionary"][code] for code in codes]
+
+
+@app.post("/predict-file/")
+async def predict_file(
+    file: UploadFile = File(...),
+    sliding_window: bool = True,
+    sheet: str | None = None,
+    columns: str | None = None,
+    granularity: str | None = None,
+    rolling: int | None = None,
+    per_handle: bool = False,
+    tz: str | None = None,
+    compact: bool = False,
+    approximate: bool = False,
+    model: str | None = None,
+):
+    """
+    Analiza el archivo, predice sentimientos y prepara datos para gráficas.
+
+    Los textos largos se analizan por ventanas deslizantes salvo que se pase
+    ``sliding_window=false`` como parámetro de consulta. En archivos Excel,
+    ``sheet`` selecciona la hoja; ``columns`` (separadas por comas) limita las
+    columnas leídas.
+
+    ``granularity`` (p. ej. "hour,day,week"), ``rolling``, ``per_handle`` y
+    ``tz`` añaden series temporales de sentimiento en 'sentiment_series'.
+
+    Con ``compact=true`` las predicciones se devuelven codificadas con
+    encode_labels en lugar de como lista de cadenas. Con ``approximate=true``
+    los agregados de usuarios y palabras usan resúmenes de memoria acotada
+    (ver sketches.py) e incluyen sus cotas de error en 'approximation'.
+    ``model`` elige un modelo del registro.
+
+    El análisis se ejecuta en el carril masivo fuera del bucle de eventos; si
+    el carril está saturado se responde 429 o 503 con Retry-After.
+    """
+    try:
+        granularities = parse_granularities(granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if rolling is not None and rolling < 1:
+        raise HTTPException(
+            status_code=400, detail="El parámetro 'rolling' debe ser mayor que 0."
+        )
+    check_model(model)
+    if tz:
+        try:
+            ZoneInfo(tz)
+        except Exception:
+            raise HTTPException(status_code=400, detail=f"Zona horaria inválida: {tz}")
+
+    contents = await file.read()
+    async with BULK_LANE.admit():
+        df = await run_in_threadpool(
+            read_table, file.filename, contents, sheet, parse_columns(columns)
+        )
+        df, data, columns = await run_in_threadpool(
+            analyze_table,
+            df,
+            sliding_window,
+            model,
+            granularities=granularities,
+            rolling=rolling,
+            per_handle=per_handle,
+            tz=tz or TIMEZONE,
+            approximate=approximate,
+        )
+
+    predicciones = df["Sentimiento"]
+    return {
+        "predicciones": (
+            encode_labels(predicciones) if compact else predicciones.tolist()
+        ),
         "data": data,
         "columns": columns,
     }
+
+
+@app.post("/predict-file-incremental/")
+async def predict_file_incremental(
+    dataset: str,
+    file: UploadFile = File(...),
+    sliding_window: bool = True,
+    sheet: str | None = None,
+    compact: bool = False,
+    model: str | None = None,
+):
+    """
+    Analiza un export acumulado reutilizando el análisis anterior del dataset.
+
+    Solo se clasifican las filas nuevas o cuyo texto cambió, y los agregados
+    guardados se actualizan restando las filas que cambiaron o desaparecieron
+    y sumando las nuevas. El resultado equivale a analizar el archivo completo
+    con /predict-file/.
+
+    Parámetros:
+        dataset (str): Nombre del análisis guardado (letras, números, '_-.').
+        file (UploadFile): Archivo completo (.csv, .xls, .xlsx).
+
+    Retorna:
+        dict: Mismo formato que /predict-file/ más 'delta' con el número de
+        filas nuevas, eliminadas y clasificadas.
+
+    El análisis guardado recuerda el modelo ('model_id') y 'sliding_window'
+    con que se clasificó; si la petición usa otros, se reclasifica todo el
+    archivo en lugar de reutilizar etiquetas.
+    """
+    check_model(model)
+    labeler = {
+        "model_id": registry.get(model).model_id,
+        "sliding_window": sliding_window,
+    }
+    try:
+        store = AnalysisStore(ANALYSIS_STORE_DIR, dataset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    contents = await file.read()
+    async with BULK_LANE.admit():
+        df = await run_in_threadpool(read_table, file.filename, contents, sheet)
+        df = await run_in_threadpool(convert_columns, df)
+        if "Post Body" not in df.columns:
+            raise HTTPException(
+                status_code=400,
+                detail="El archivo no contiene la columna 'Post Body'.",
+            )
+        df, data, delta = await run_in_threadpool(
+            analyze_delta,
+            df,
+            store,
+            lambda textos: predict_labels(textos, sliding_window, model),
+            tz=TIMEZONE,
+            labeler=labeler,
+        )
+        if "Interacciones y Audiencia" in df.columns:
+            data["post_max_interacciones"] = post_max_interacciones(df)
+
+    predicciones = df["Sentimiento"]
+    return {
+        "predicciones": (
+            encode_labels(predicciones) if compact else predicciones.tolist()
+        ),
+        "data": data,
+        "columns": df.columns.tolist(),
+        "delta": delta,
+    }
+
+
+def check_excel_rows(rows: int):
+    """
+    Responde 413 si las filas (más el encabezado) no caben en una hoja de Excel.
+    """
+    if rows + 1 > EXCEL_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"El archivo tiene {rows} filas; una hoja de Excel admite como "
+                f"máximo {EXCEL_MAX_ROWS - 1}. Usa /predict-file/ en su lugar."
+            ),
+        )
+
+
+def write_annotated_excel(
+    df: pd.DataFrame, data: dict, columns: list, sheet_name: str = "Datos"
+) -> bytes:
+    """
+    Escribe el libro anotado en modo de memoria constante (xlsxwriter).
+
+    Parámetros:
+        df (pd.DataFrame): DataFrame anotado devuelto por analyze_table.
+        data (dict): Agregados del dashboard.
+        columns (list): Columnas a exportar, en orden.
+        sheet_name (str): Nombre de la hoja de datos.
+
+    Retorna:
+        bytes: Contenido del archivo .xlsx.
+    """
+    check_excel_rows(len(df))
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(
+        output,
+        {
+            "constant_memory": True,
+            "default_date_format": "dd/mm/yyyy hh:mm",
+            # Fechas con zona (p. ej. offsets mixtos por horario de verano)
+            "remove_timezone": True,
+            "strings_to_urls": False,
+        },
+    )
+    bold = workbook.add_format({"bold": True})
+
+    # Hoja original + columna 'Sentimiento', escrita fila a fila
+    sheet = workbook.add_worksheet(sheet_name[:31])
+    sheet.write_row(0, 0, columns, bold)
+    values = df[columns].astype(object)
+    for row, record in enumerate(values.itertuples(index=False, name=None), 1):
+        sheet.write_row(row, 0, record)
+
+    # Hoja de resumen
+    summary = workbook.add_worksheet("Resumen")
+    summary.write_row(0, 0, ["Sentimiento", "Conteo"], bold)
+    row = 1
+    for label, count in data.get("sentiment_counts", {}).items():
+        summary.write_row(row, 0, [label, int(count)])
+        row += 1
+    row += 1
+    for key in ["total_retweets", "total_likes", "total_views", "total_comments"]:
+        summary.write_row(row, 0, [key, data.get(key, 0)])
+        row += 1
+    for tipo, conteo in data.get("conteo_tipo_cuenta", {}).items():
+        summary.write_row(row, 0, [tipo, conteo])
+        row += 1
+
+    workbook.close()
+    return output.getvalue()
+
+
+@app.post("/predict-file-excel/")
+async def predict_file_excel(
+    file: UploadFile = File(...),
+    sliding_window: bool = True,
+    sheet: str | None = None,
+    columns: str | None = None,
+    model: str | None = None,
+):
+    """
+    Analiza el archivo y devuelve el libro Excel anotado.
+
+    El libro contiene la hoja original con la columna 'Sentimiento' y una hoja
+    'Resumen' con los conteos por sentimiento y las estadísticas generales.
+    """
+    check_model(model)
+    contents = await file.read()
+    sheet_name = sheet if sheet and not sheet.isdigit() else "Datos"
+    async with BULK_LANE.admit():
+        df = await run_in_threadpool(
+            read_table, file.filename, contents, sheet, parse_columns(columns)
+        )
+        check_excel_rows(len(df))
+        df, data, columns = await run_in_threadpool(
+            analyze_table, df, sliding_window, model
+        )
+        content = await run_in_threadpool(
+            write_annotated_excel, df, data, columns, sheet_name
+        )
+
+    base_name = os.path.splitext(file.filename or "resultado")[0]
+    download_name = f"{base_name}_sentimiento.xlsx"
+    return Response(
+        content=content,
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{download_name}"'},
+    )
+
+
+def check_admin(token: str | None):
+    """
+    Exige el encabezado X-Admin-Token; sin ADMIN_TOKEN responde siempre 403.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="La administración de modelos está deshabilitada.",
+        )
+    if not hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=403, detail="Token de administración inválido."
+        )
+
+
+@app.get("/models")
+def list_models():
+    """
+    Lista los modelos cargados, su memoria y las cargas en curso.
+    """
+    return registry.status()
+
+
+@app.post("/models", status_code=202)
+def load_model(input: ModelLoadInput, x_admin_token: str | None = Header(None)):
+    """
+    Carga un modelo en segundo plano y lo publica cuando está listo.
+
+    El modelo se descarga, se calienta con una inferencia de prueba y luego
+    reemplaza de forma atómica al que tenga el mismo nombre (si existe); las
+    peticiones en curso terminan con el modelo anterior. El progreso se
+    consulta en GET /models.
+
+    Parámetros:
+        input (ModelLoadInput): 'name', 'model_id' de Hugging Face y
+            'make_default' para enviar a este modelo el tráfico sin 'model'.
+    """
+    check_admin(x_admin_token)
+    started = registry.load_in_background(
+        input.name, input.model_id, input.make_default
+    )
+    if not started:
+        raise HTTPException(
+            status_code=409, detail=f"El modelo {input.name} ya se está cargando."
+        )
+    return {"status": "loading", "name": input.name}
+
+
+@app.delete("/models/{name}")
+def unload_model(name: str, x_admin_token: str | None = Header(None)):
+    """
+    Deja de servir un modelo y libera su memoria.
+    """
+    check_admin(x_admin_token)
+    try:
+        registry.unload(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Modelo no encontrado: {name}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return registry.status()
+
+
+@app.get("/admission")
+def admission_status():
+    """
+    Métricas del control de admisión: peticiones activas, profundidad de cola,
+    rechazos y tiempos de espera de cada carril, y ocupación del modelo.
+    """
+    return {
+        "interactive": INTERACTIVE_LANE.metrics(),
+        "bulk": BULK_LANE.metrics(),
+        "model": MODEL_GATE.metrics(),
+    }
@@ -0,0 +1,180 @@
+import gc
+import hashlib
+import threading
+import time
+
+import torch
+from transformers import BertForSequenceClassification, BertTokenizer
+
+# Texto usado para calentar un modelo antes de recibir tráfico
+WARMUP_TEXT = "Texto de prueba para calentar el modelo."
+
+
+def load_pretrained(model_id: str):
+    """
+    Carga el tokenizer y el modelo de clasificación desde Hugging Face.
+    """
+    tokenizer = BertTokenizer.from_pretrained(model_id)
+    model = BertForSequenceClassification.from_pretrained(model_id)
+    model.eval()
+    return tokenizer, model
+
+
+def vocab_fingerprint(tokenizer) -> str:
+    """
+    Huella del vocabulario, la normalización y la longitud máxima de un
+    tokenizer.
+
+    Dos tokenizers con la misma huella producen los mismos ids (y las mismas
+    ventanas en split_windows), por lo que los modelos que los usan pueden
+    compartir una sola instancia.
+    """
+    basic = getattr(tokenizer, "basic_tokenizer", None)
+    digest = hashlib.sha256()
+    digest.update(type(tokenizer).__name__.encode())
+    digest.update(str(getattr(tokenizer, "do_lower_case", None)).encode())
+    for name in ["strip_accents", "tokenize_chinese_chars"]:
+        value = getattr(tokenizer, name, getattr(basic, name, None))
+        digest.update(f"{name}={value}\n".encode())
+    digest.update(f"model_max_length={tokenizer.model_max_length}\n".encode())
+    for token, idx in sorted(tokenizer.get_vocab().items(), key=lambda x: x[1]):
+        digest.update(f"{idx}:{token}\n".encode())
+    return digest.hexdigest()
+
+
+def model_memory(model) -> int:
+    """
+    Bytes ocupados por los parámetros y buffers de un modelo.
+    """
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class LoadedModel:
+    """
+    Un modelo listo para inferencia junto con su tokenizer.
+    """
+
+    def __init__(self, name: str, model_id: str, tokenizer, model, fingerprint: str):
+        self.name = name
+        self.model_id = model_id
+        self.tokenizer = tokenizer
+        self.model = model
+        self.fingerprint = fingerprint
+        self.memory_bytes = model_memory(model)
+        self.loaded_at = time.time()
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "model_id": self.model_id,
+            "memory_mb": round(self.memory_bytes / 2**20, 1),
+            "tokenizer": self.fingerprint[:12],
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """
+    Modelos servidos por el proceso, con carga en segundo plano y cambio atómico.
+
+    Cada petición obtiene el LoadedModel actual con get(); reemplazar un nombre
+    solo cambia la referencia del diccionario, de modo que las peticiones en
+    curso terminan con el modelo anterior y este se libera cuando ya nadie lo
+    usa.
+    """
+
+    def __init__(self, loader=load_pretrained):
+        self.loader = loader
+        self.models = {}
+        self.default = None
+        self.loading = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str | None = None) -> LoadedModel:
+        """
+        Devuelve el modelo con ese nombre, o el modelo por defecto.
+        """
+        entry = self.models.get(name or self.default)
+        if entry is None:
+            raise KeyError(name)
+        return entry
+
+    def _shared_tokenizer(self, tokenizer):
+        fingerprint = vocab_fingerprint(tokenizer)
+        with self.lock:
+            entries = list(self.models.values())
+        for entry in entries:
+            if entry.fingerprint == fingerprint:
+                return entry.tokenizer, fingerprint
+        return tokenizer, fingerprint
+
+    def load(
+        self, name: str, model_id: str, make_default: bool = False
+    ) -> LoadedModel:
+        """
+        Carga, calienta y publica un modelo bajo 'name' (bloqueante).
+
+        Si ya había un modelo con ese nombre se reemplaza de forma atómica y
+        se libera la memoria del anterior.
+        """
+        tokenizer, model = self.loader(model_id)
+        tokenizer, fingerprint = self._shared_tokenizer(tokenizer)
+        entry = LoadedModel(name, model_id, tokenizer, model, fingerprint)
+        with torch.no_grad():
+            model(**tokenizer([WARMUP_TEXT], return_tensors="pt"))
+
+        with self.lock:
+            previous = self.models.get(name)
+            self.models[name] = entry
+            if make_default or self.default is None:
+                self.default = name
+            self.loading.pop(name, None)
+        if previous is not None:
+            del previous
+            gc.collect()
+        return entry
+
+    def load_in_background(
+        self, name: str, model_id: str, make_default: bool = False
+    ) -> bool:
+        """
+        Lanza load() en un hilo; devuelve False si ese nombre ya se está cargando.
+        """
+        with self.lock:
+            if self.loading.get(name) == "loading":
+                return False
+            self.loading[name] = "loading"
+
+        def run():
+            try:
+                self.load(name, model_id, make_default)
+            except Exception as e:
+                with self.lock:
+                    self.loading[name] = f"error: {e}"
+
+        threading.Thread(target=run, name=f"load-{name}", daemon=True).start()
+        return True
+
+    def unload(self, name: str):
+        """
+        Deja de servir un modelo; el modelo por defecto no se puede descargar.
+        """
+        with self.lock:
+            if name == self.default:
+                raise ValueError("No se puede descargar el modelo por defecto.")
+            if self.models.pop(name, None) is None:
+                raise KeyError(name)
+        gc.collect()
+
+    def status(self) -> dict:
+        """
+        Modelos cargados (con su memoria), modelo por defecto y cargas en curso.
+        """
+        models = [entry.status() for entry in list(self.models.values())]
+        return {
+            "default": self.default,
+            "models": models,
+            "total_memory_mb": round(sum(m["memory_mb"] for m in models), 1),
+            "loading": dict(self.loading),
+        }
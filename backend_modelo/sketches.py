@@ -0,0 +1,319 @@
+"""
+Resúmenes probabilísticos de memoria acotada para archivos muy grandes.
+
+Todos los resúmenes se actualizan por bloques con operaciones vectorizadas y
+se pueden combinar con ``merge`` (por ejemplo, entre fragmentos de un mismo
+dataset procesados por separado).
+
+Cotas de error (N = total de elementos o peso procesado):
+    CountMinSketch: estimación >= real y <= real + (e / width) * N con
+        probabilidad >= 1 - e^-depth.
+    SpaceSaving: conserva todo elemento con frecuencia > N / k; cada conteo
+        sobreestima el real en como mucho N / k.
+    HyperLogLog: error relativo típico 1.04 / sqrt(2^p) (p=12: ~1.6 %).
+    BottomKSample: muestra uniforme sin reemplazo de tamaño k.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aggregates import STOPWORDS, top_word_tokens
+
+# Separador de los campos de una clave compuesta (p. ej. Name + Handle)
+KEY_SEPARATOR = "\x1f"
+
+
+def hash_values(values) -> np.ndarray:
+    """
+    Hash uint64 vectorizado de una secuencia de valores.
+    """
+    values = np.asarray(values, dtype=object)
+    return pd.util.hash_array(values.astype(str).astype(object))
+
+
+class CountMinSketch:
+    """
+    Conteos aproximados de frecuencia en una matriz fija de depth x width.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _indices(self, hashes: np.ndarray) -> np.ndarray:
+        # Doble hashing: h1 + d * h2 a partir de las dos mitades del hash
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(
+            np.int64
+        )
+
+    def update(self, values, counts=None):
+        """
+        Suma 'counts' (1 por defecto) a cada valor.
+        """
+        hashes = hash_values(values)
+        counts = np.ones(len(hashes), np.int64) if counts is None else counts
+        counts = np.asarray(counts, dtype=np.int64)
+        indices = self._indices(hashes)
+        for row in range(self.depth):
+            np.add.at(self.table[row], indices[row], counts)
+        self.total += int(counts.sum())
+
+    def estimate(self, values) -> np.ndarray:
+        """
+        Estimación (cota superior) de la frecuencia de cada valor.
+        """
+        indices = self._indices(hash_values(values))
+        return self.table[np.arange(self.depth)[:, None], indices].min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    @property
+    def error_bound(self) -> float:
+        return np.e / self.width * self.total
+
+
+class SpaceSaving:
+    """
+    Top-k aproximado (Space-Saving) sobre conteos o pesos no negativos.
+
+    Cada bloque se resume primero de forma exacta y luego se combina con el
+    resumen acumulado: los elementos no monitorizados heredan el mínimo del
+    resumen ('floor'), que acota su conteo real.
+    """
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.counts = pd.Series(dtype=np.int64)
+        self.floor = 0
+        self.total = 0
+
+    def _combine(self, counts: pd.Series, floor: int):
+        combined = self.counts.add(counts, fill_value=0)
+        combined.loc[~combined.index.isin(self.counts.index)] += self.floor
+        combined.loc[~combined.index.isin(counts.index)] += floor
+        if len(combined) > self.k:
+            combined = combined.nlargest(self.k)
+            self.floor = self.floor + floor
+            self.floor = max(self.floor, int(combined.iloc[-1]))
+        else:
+            self.floor += floor
+        self.counts = combined.astype(np.int64)
+
+    def update(self, values, counts=None):
+        """
+        Suma 'counts' (1 por defecto) a cada valor.
+        """
+        weights = pd.Series(
+            1 if counts is None else np.asarray(counts), index=np.asarray(values)
+        )
+        chunk = weights.groupby(level=0).sum().astype(np.int64)
+        self.total += int(chunk.sum())
+        self._combine(chunk, 0)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        self.total += other.total
+        self._combine(other.counts, other.floor)
+        return self
+
+    def top(self, n: int) -> pd.Series:
+        """
+        Los n elementos con mayor conteo estimado.
+        """
+        return self.counts.nlargest(n)
+
+    @property
+    def error_bound(self) -> float:
+        return self.total / self.k
+
+
+def refine_top(summary: SpaceSaving, sketch: CountMinSketch, n: int) -> pd.Series:
+    """
+    Los n candidatos de Space-Saving con mayor conteo refinado.
+
+    Ambas estimaciones son cotas superiores del conteo real, así que se toma
+    el mínimo de las dos antes de ordenar.
+    """
+    candidates = summary.top(summary.k)
+    if not len(candidates):
+        return candidates
+    refined = np.minimum(candidates.to_numpy(), sketch.estimate(candidates.index))
+    return pd.Series(refined, index=candidates.index).nlargest(n)
+
+
+class HyperLogLog:
+    """
+    Número aproximado de valores distintos con 2^p registros de un byte.
+    """
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values):
+        hashes = hash_values(values)
+        index = (hashes & np.uint64(self.m - 1)).astype(np.int64)
+        rest = (hashes >> np.uint64(self.p)).astype(np.float64)
+        # frexp da la longitud en bits exacta (rest < 2^53)
+        bit_length = np.frexp(rest)[1]
+        rank = (64 - self.p) - bit_length + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m**2 / np.sum(2.0 ** -self.registers.astype(float))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * np.log(self.m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / np.sqrt(self.m)
+
+
+class BottomKSample:
+    """
+    Muestra uniforme de k elementos: conserva las k claves aleatorias menores.
+    """
+
+    def __init__(self, k: int = 5, seed: int | None = None):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.items = []
+
+    def update(self, items: list):
+        keys = np.concatenate([self.keys, self.rng.random(len(items))])
+        items = self.items + list(items)
+        keep = np.argsort(keys, kind="stable")[: self.k]
+        self.keys = keys[keep]
+        self.items = [items[i] for i in keep]
+
+    def merge(self, other: "BottomKSample") -> "BottomKSample":
+        keys = np.concatenate([self.keys, other.keys])
+        items = self.items + other.items
+        keep = np.argsort(keys, kind="stable")[: self.k]
+        self.keys = keys[keep]
+        self.items = [items[i] for i in keep]
+        return self
+
+
+class DashboardSketch:
+    """
+    Agregados aproximados del dashboard en memoria fija.
+
+    Calcula 'top_words' y 'top_users' (Space-Saving refinado con Count-Min;
+    los usuarios ponderados por 'Interacciones y Audiencia'), usuarios y
+    autores distintos (HyperLogLog) y ejemplos de posts por sentimiento.
+    """
+
+    def __init__(
+        self,
+        stopwords: set = STOPWORDS,
+        top_k: int = 200,
+        samples: int = 5,
+        seed: int | None = None,
+    ):
+        self.stopwords = stopwords
+        self.words = SpaceSaving(top_k)
+        self.word_counts = CountMinSketch()
+        self.users = SpaceSaving(top_k)
+        # Más ancho que el de palabras: los pesos por usuario suman mucho más
+        self.user_counts = CountMinSketch(width=8192)
+        self.handles = HyperLogLog()
+        self.authors = HyperLogLog()
+        self.samples = samples
+        self.seed = seed
+        self.posts = {}
+
+    def update(self, df: pd.DataFrame):
+        """
+        Incorpora un bloque de filas clasificadas.
+        """
+        if "Post Body" in df.columns:
+            words = top_word_tokens(df["Post Body"], self.stopwords)
+            if words:
+                self.words.update(words)
+                self.word_counts.update(words)
+
+        if "Handle" in df.columns:
+            self.handles.update(df["Handle"].to_numpy())
+        if "Name" in df.columns:
+            self.authors.update(df["Name"].to_numpy())
+        user_columns = ["Name", "Handle", "Interacciones y Audiencia"]
+        if all(col in df.columns for col in user_columns) and len(df):
+            keys = df["Name"].astype(str) + KEY_SEPARATOR + df["Handle"].astype(str)
+            weights = pd.to_numeric(df["Interacciones y Audiencia"], errors="coerce")
+            weights = weights.fillna(0).clip(lower=0).astype(np.int64)
+            self.users.update(keys.to_numpy(), weights)
+            self.user_counts.update(keys.to_numpy(), weights)
+
+        if "Sentimiento" in df.columns and "Post Body" in df.columns:
+            for label, posts in df.groupby("Sentimiento")["Post Body"]:
+                if label not in self.posts:
+                    seed = None if self.seed is None else self.seed + len(self.posts)
+                    self.posts[label] = BottomKSample(self.samples, seed)
+                self.posts[label].update(posts.astype(str).tolist())
+
+    def merge(self, other: "DashboardSketch") -> "DashboardSketch":
+        """
+        Combina con el resumen de otro fragmento del mismo dataset.
+        """
+        self.words.merge(other.words)
+        self.word_counts.merge(other.word_counts)
+        self.users.merge(other.users)
+        self.user_counts.merge(other.user_counts)
+        self.handles.merge(other.handles)
+        self.authors.merge(other.authors)
+        for label, sample in other.posts.items():
+            if label in self.posts:
+                self.posts[label].merge(sample)
+            else:
+                self.posts[label] = sample
+        return self
+
+    def render(self, data: dict) -> dict:
+        """
+        Escribe los agregados aproximados en el diccionario 'data'.
+        """
+        words = refine_top(self.words, self.word_counts, 20)
+        if len(words):
+            data["top_words"] = [(w, int(c)) for w, c in words.items()]
+        if self.users.total or len(self.users.counts):
+            users = refine_top(self.users, self.user_counts, 10)
+            data["top_users"] = [
+                {
+                    "Name": key.split(KEY_SEPARATOR, 1)[0],
+                    "Handle": key.split(KEY_SEPARATOR, 1)[1],
+                    "Interacciones y Audiencia": int(total),
+                }
+                for key, total in users.items()
+            ]
+        data["unique_handles"] = self.handles.count()
+        data["unique_authors"] = self.authors.count()
+        data["sample_posts"] = {
+            label: sample.items for label, sample in self.posts.items()
+        }
+        data["approximation"] = {
+            "top_words_max_error": round(
+                min(self.words.error_bound, self.word_counts.error_bound), 2
+            ),
+            "top_users_max_error": round(
+                min(self.users.error_bound, self.user_counts.error_bound), 2
+            ),
+            "unique_relative_error": round(self.handles.relative_error, 4),
+        }
+        return data
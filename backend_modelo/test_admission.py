@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from admission import BULK, CURRENT_PRIORITY, INTERACTIVE, Lane, PriorityGate
+
+def make_lane(**kwargs):
+    options = dict(concurrency=1, queue_size=1, max_wait=1.0, retry_after=7)
+    options.update(kwargs)
+    return Lane("test", BULK, **options)
+
+def test_lane_rejects_when_queue_full():
+    async def scenario():
+        lane = make_lane()
+        release = asyncio.Event()
+
+        async def hold():
+            async with lane.admit():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert lane.metrics()["queue_depth"] == 1
+
+        with pytest.raises(HTTPException) as exc:
+            async with lane.admit():
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return lane, exc.value
+
+    lane, error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.headers == {"Retry-After": "7"}
+    metrics = lane.metrics()
+    assert metrics["admitted"] == 2
+    assert metrics["rejected"] == 1
+    assert metrics["active"] == 0 and metrics["queue_depth"] == 0
+
+def test_lane_times_out_waiting():
+    async def scenario():
+        lane = make_lane(max_wait=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with lane.admit():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc:
+            async with lane.admit():
+                pass
+        release.set()
+        await holder
+        return lane, exc.value
+
+    lane, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "7"
+    assert lane.metrics()["timed_out"] == 1
+    assert lane.metrics()["queue_depth"] == 0
+
+def test_lane_priority_reaches_threadpool():
+    async def scenario():
+        async with make_lane().admit():
+            inside = await run_in_threadpool(CURRENT_PRIORITY.get)
+        return inside, CURRENT_PRIORITY.get()
+
+    assert asyncio.run(scenario()) == (BULK, INTERACTIVE)
+
+def test_gate_serves_interactive_first():
+    gate = PriorityGate(slots=1)
+    order = []
+
+    def work(priority, name):
+        with gate.slot(priority):
+            order.append(name)
+
+    with gate.slot(BULK):
+        threads = [threading.Thread(target=work, args=(BULK, "bulk"))]
+        threads[0].start()
+        while gate.metrics()["waiting_bulk"] == 0:
+            time.sleep(0.001)
+        threads.append(threading.Thread(target=work, args=(INTERACTIVE, "int")))
+        threads[1].start()
+        while gate.metrics()["waiting_interactive"] == 0:
+            time.sleep(0.001)
+        assert gate.metrics()["busy"] == 1
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ["int", "bulk"]
+    assert gate.metrics()["busy"] == 0
@@ -0,0 +1,28 @@
+import pandas as pd
+from aggregates import STOPWORDS, account_type_counts, column_totals, top_word_tokens
+
+def test_shared_aggregates():
+    df = pd.DataFrame(
+        {
+            "Post Body": ["Hola, de nuevo ¡Hola!", None],
+            "Likes": [2, 3],
+            "Bots": ["1", ""],
+            "Sentimiento": ["positivo", "negativo"],
+        }
+    )
+    assert top_word_tokens(df["Post Body"], {"nuevo"}) == ["hola", "hola"]
+    assert column_totals(df) == {
+        "total_retweets": 0,
+        "total_likes": 5,
+        "total_views": 0,
+        "total_comments": 0,
+    }
+    assert account_type_counts(df) == (
+        {"Bots": 1},
+        {"Bots": {"positivo": 1, "negativo": 0, "neutro": 0}},
+    )
+
+def test_top_word_tokens_default_stopwords():
+    assert top_word_tokens(pd.Series(["Que bueno tras la lluvia"])) == [
+        w for w in ["bueno", "lluvia"] if w not in STOPWORDS
+    ]
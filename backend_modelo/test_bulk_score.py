@@ -0,0 +1,80 @@
+import json
+import os
+import pandas as pd
+from bulk_score import Checkpoint, expand_inputs, main
+
+def write_csv(path, rows):
+    pd.DataFrame({"Post Body": rows, "Likes": range(len(rows))}).to_csv(
+        path, index=False
+    )
+
+def test_expand_inputs(tmp_path):
+    write_csv(tmp_path / "a.csv", ["Texto"])
+    (tmp_path / "notas.txt").write_text("x")
+    paths = expand_inputs([str(tmp_path / "*"), str(tmp_path / "a.csv")])
+    assert paths == [str(tmp_path / "a.csv")]
+
+def test_checkpoint_roundtrip(tmp_path):
+    source = tmp_path / "a.csv"
+    write_csv(source, ["Texto"])
+    checkpoint = Checkpoint(str(tmp_path), "a", str(source))
+    checkpoint.reset()
+    checkpoint.append(["positivo", "negativo"])
+    assert Checkpoint(str(tmp_path), "a", str(source)).load() == [
+        "positivo",
+        "negativo",
+    ]
+    # Otro modo de ventanas invalida el checkpoint
+    assert Checkpoint(str(tmp_path), "a", str(source), False).load() == []
+    # Un archivo modificado invalida el checkpoint
+    write_csv(source, ["Texto", "Otro texto más largo"])
+    assert Checkpoint(str(tmp_path), "a", str(source)).load() == []
+
+def test_bulk_score_resumes(tmp_path):
+    source = tmp_path / "a.csv"
+    write_csv(source, ["Me gusta", "No me gusta", "Está bien"])
+    out = tmp_path / "out"
+    checkpoint = Checkpoint(str(out), "a", str(source))
+    checkpoint.reset()
+    checkpoint.append(["positivo"])
+
+    assert main([str(source), "-o", str(out), "--checkpoint-rows", "1"]) == 0
+    annotated = pd.read_csv(out / "a_sentimiento.csv")
+    assert len(annotated) == 3
+    assert annotated["Sentimiento"].iloc[0] == "positivo"
+    with open(out / "a_data.json") as f:
+        assert "sentiment_counts" in json.load(f)["data"]
+    assert not os.path.exists(checkpoint.codes_path)
+
+def test_bulk_score_mirrors_input_tree(tmp_path):
+    for year in ["2024", "2025"]:
+        (tmp_path / "in" / year).mkdir(parents=True)
+        write_csv(tmp_path / "in" / year / "a.csv", [f"Texto {year}"])
+    out = tmp_path / "out"
+    assert main([str(tmp_path / "in" / "**" / "*.csv"), "-o", str(out)]) == 0
+    for year in ["2024", "2025"]:
+        annotated = pd.read_csv(out / year / "a_sentimiento.csv")
+        assert annotated["Post Body"].tolist() == [f"Texto {year}"]
+        assert os.path.exists(out / year / "a_data.json")
+
+def test_bulk_score_rejects_colliding_outputs(tmp_path):
+    write_csv(tmp_path / "a.csv", ["Texto"])
+    pd.DataFrame({"Post Body": ["Otro"]}).to_excel(tmp_path / "a.xlsx", index=False)
+    out = tmp_path / "out"
+    assert main([str(tmp_path / "a.*"), "-o", str(out)]) == 1
+    assert not os.path.exists(out / "a_sentimiento.csv")
+
+def test_bulk_score_parquet(tmp_path):
+    write_csv(tmp_path / "a.csv", ["Me gusta", "No me gusta"])
+    # Celda numérica vacía: pandas la lee como NaN en una columna float
+    pd.DataFrame({"Post Body": ["Hola", "Adiós"], "Puntaje": [1.5, None]}).to_excel(
+        tmp_path / "b.xlsx", index=False
+    )
+    out = tmp_path / "out"
+    assert main([str(tmp_path / "*"), "-o", str(out), "--format", "parquet"]) == 0
+    annotated = pd.read_parquet(out / "a_sentimiento.parquet")
+    assert annotated["Post Body"].tolist() == ["Me gusta", "No me gusta"]
+    assert "Sentimiento" in annotated.columns
+    annotated = pd.read_parquet(out / "b_sentimiento.parquet")
+    assert annotated["Puntaje"].iloc[0] == 1.5
+    assert annotated["Puntaje"].isna().iloc[1]
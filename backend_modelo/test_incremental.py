@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+import pandas as pd
+from incremental import (
+    AnalysisStore,
+    analyze_delta,
+    partial_aggregates,
+    render_aggregates,
+)
+
+def fake_classify(calls):
+    def classify(textos):
+        calls.extend(textos)
+        return ["positivo" if "bien" in t else "negativo" for t in textos]
+    return classify
+
+def make_df(rows):
+    df = pd.DataFrame(
+        rows, columns=["Tweet URL", "Post Body", "Name", "Handle", "Likes", "Date"]
+    )
+    df["Interacciones y Audiencia"] = df["Likes"]
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+DAY1 = [
+    ["u1", "todo bien hoy", "Ana", "@ana", 5, "2024-01-01"],
+    ["u2", "muy mal servicio", "Luis", "@luis", 3, "2024-01-15"],
+]
+DAY2 = DAY1[:1] + [
+    ["u2", "muy mal servicio", "Luis", "@luis", 10, "2024-01-15"],
+    ["u3", "bien bien", "Ana", "@ana", 1, "2024-02-01"],
+]
+
+def test_analyze_delta_classifies_only_new_rows(tmp_path):
+    store = AnalysisStore(str(tmp_path), "monitoreo")
+    calls = []
+    analyze_delta(make_df(DAY1), store, fake_classify(calls), set())
+    assert len(calls) == 2
+
+    calls.clear()
+    df, data, delta = analyze_delta(make_df(DAY2), store, fake_classify(calls), set())
+    # u2 cambió solo en 'Likes': su etiqueta se reutiliza por hash de texto
+    assert calls == ["bien bien"]
+    assert delta == {
+        "new_rows": 2,
+        "removed_rows": 1,
+        "classified_rows": 1,
+        "reclassified_all": False,
+    }
+    assert df["Sentimiento"].tolist() == ["positivo", "negativo", "positivo"]
+
+    full = make_df(DAY2)
+    full["Sentimiento"] = df["Sentimiento"]
+    expected = render_aggregates(partial_aggregates(full, set()))
+    assert data == expected
+    assert data["total_likes"] == 16
+    assert data["top_users"][0] == {
+        "Name": "Luis",
+        "Handle": "@luis",
+        "Interacciones y Audiencia": 10,
+    }
+    assert {"YearMonth": "2024-02", "Sentimiento": "positivo", "Conteo": 1} in (
+        data["sentiment_month"]
+    )
+
+def test_analyze_delta_reclassifies_on_labeler_change(tmp_path):
+    store = AnalysisStore(str(tmp_path), "monitoreo")
+    labeler = {"model_id": "modelo-a", "sliding_window": True}
+    analyze_delta(make_df(DAY1), store, fake_classify([]), set(), labeler=labeler)
+
+    calls = []
+    other = {"model_id": "modelo-b", "sliding_window": True}
+    df, data, delta = analyze_delta(
+        make_df(DAY1), store, fake_classify(calls), set(), labeler=other
+    )
+    assert len(calls) == 2
+    assert delta["reclassified_all"] and delta["new_rows"] == 2
+    assert sum(data["sentiment_counts"].values()) == 2
+    assert store.load()[2] == other
+
+def test_analysis_store_rejects_bad_names(tmp_path):
+    try:
+        AnalysisStore(str(tmp_path), "../otro")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Se esperaba ValueError")
+
+def test_analysis_store_saves_single_state(tmp_path):
+    store = AnalysisStore(str(tmp_path), "monitoreo")
+    analyze_delta(make_df(DAY1), store, fake_classify([]), set())
+    assert sorted(os.listdir(store.path)) == ["lock", "state.pkl"]
+    rows, aggregates, _ = store.load()
+    assert len(rows) == 2
+    assert sum(aggregates["sentiment_counts"].values()) == 2
+
+def test_analyze_delta_serializes_same_dataset(tmp_path):
+    store = AnalysisStore(str(tmp_path), "monitoreo")
+    active = []
+    overlaps = []
+
+    def slow_classify(textos):
+        active.append(1)
+        overlaps.append(len(active) > 1)
+        time.sleep(0.05)
+        active.pop()
+        return ["neutro"] * len(textos)
+
+    threads = [
+        threading.Thread(
+            target=analyze_delta, args=(make_df(day), store, slow_classify, set())
+        )
+        for day in [DAY1, DAY2]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps and not any(overlaps)
+    rows, aggregates, _ = store.load()
+    assert sum(aggregates["sentiment_counts"].values()) == len(rows)
@@ -1,7 +1,19 @@
 from fastapi.testclient import TestClient
-from main import app
+from main import (
+    app,
+    MAX_BATCH_BODY_BYTES,
+    MAX_BATCH_ITEMS,
+    MAX_TEXT_LENGTH,
+    MAX_TOKENS,
+    WINDOW_STRIDE,
+    build_dashboard_data,
+    decode_labels,
+    encode_labels,
+    split_windows,
+)
 import io
 import pandas as pd
+from incremental import partial_aggregates, render_aggregates
 
 client = TestClient(app)
 
@@ -16,11 +28,26 @@ def test_predict_empty_text():
     assert response.json()["detail"] == "El texto no puede estar vacío."
 
 def test_predict_long_text():
-    long_text = "a" * 600
+    long_text = "a" * (MAX_TEXT_LENGTH + 1)
     response = client.post("/predict", json={"text": long_text})
     assert response.status_code == 400
     assert "no puede exceder" in response.json()["detail"]
 
+def test_predict_long_text_sliding_window():
+    long_text = "Este es un texto de prueba bastante largo. " * 100
+    response = client.post("/predict", json={"text": long_text})
+    assert response.status_code == 200
+    assert response.json()["prediction"] in ["negativo", "neutro", "positivo"]
+
+def test_split_windows_overlap():
+    ids = list(range(2000))
+    windows = split_windows(ids)
+    assert len(windows) > 1
+    assert windows[0][0] == 0 and windows[-1][-1] == 1999
+    assert all(len(w) <= MAX_TOKENS for w in windows)
+    assert windows[1][0] == len(windows[0]) - WINDOW_STRIDE
+    assert split_windows(ids, sliding_window=False) == [windows[0]]
+
 def test_read_file_csv_columns():
     # Crear un CSV en memoria
     csv_content = "Post Body,OtraColumna\nTexto de prueba,123\n"
@@ -66,4 +93,189 @@ def test_predict_file_no_post_body():
         files={"file": ("test.csv", file, "text/csv")},
     )
     assert response.status_code == 400
-    assert "no contiene la columna" in response.json()["detail"]
\ No newline at end of file
+    assert "no contiene la columna" in response.json()["detail"]
+def test_predict_batch_ok():
+    response = client.post(
+        "/predict-batch",
+        json={
+            "texts": ["Me encanta", "", "Lo odio"],
+            "ids": ["a", "b", "c"],
+            "return_indices": True,
+            "return_probabilities": True,
+        },
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["labels"]) == 3
+    assert body["labels"][1] == "desconocido"
+    assert body["ids"] == ["a", "b", "c"]
+    assert body["label_indices"][1] == -1
+    assert body["probabilities"][1] is None
+    assert abs(sum(body["probabilities"][0]) - 1) < 1e-2
+
+def test_predict_batch_skips_jsonable_encoder(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("jsonable_encoder no debe usarse")
+
+    monkeypatch.setattr("fastapi.routing.jsonable_encoder", fail)
+    response = client.post("/predict-batch", json={"texts": ["Me encanta"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+def test_predict_batch_ids_mismatch():
+    response = client.post("/predict-batch", json={"texts": ["a"], "ids": [1, 2]})
+    assert response.status_code == 400
+
+def test_predict_batch_too_many_items():
+    texts = ["texto"] * (MAX_BATCH_ITEMS + 1)
+    response = client.post("/predict-batch", json={"texts": texts})
+    assert response.status_code == 413
+
+def test_predict_batch_body_too_large():
+    body = b'{"texts": ["' + b"a" * MAX_BATCH_BODY_BYTES + b'"]}'
+    response = client.post(
+        "/predict-batch", content=body, headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 413
+    assert "cuerpo" in response.json()["detail"]
+
+def test_predict_batch_invalid_body():
+    response = client.post("/predict-batch", json={"texts": "no es una lista"})
+    assert response.status_code == 422
+
+def test_predict_file_excel_annotated():
+    df = pd.DataFrame({"Post Body": ["Me gusta", "No me gusta"], "Likes": [1, 2]})
+    excel_file = io.BytesIO()
+    df.to_excel(excel_file, index=False, sheet_name="Export")
+    excel_file.seek(0)
+    response = client.post(
+        "/predict-file-excel/?sheet=Export&columns=Likes",
+        files={"file": ("test.xlsx", excel_file, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+    )
+    assert response.status_code == 200
+    sheets = pd.read_excel(io.BytesIO(response.content), sheet_name=None)
+    assert list(sheets) == ["Export", "Resumen"]
+    assert list(sheets["Export"].columns) == ["Post Body", "Likes", "Sentimiento"]
+    assert len(sheets["Export"]) == 2
+
+def test_predict_file_excel_mixed_offsets():
+    csv_content = (
+        "Post Body,Date\n"
+        "Me gusta,2024-01-01T10:00:00-05:00\n"
+        "No me gusta,2024-07-01T10:00:00-04:00\n"
+    )
+    response = client.post(
+        "/predict-file-excel/",
+        files={"file": ("test.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")},
+    )
+    assert response.status_code == 200
+    datos = pd.read_excel(io.BytesIO(response.content), sheet_name="Datos")
+    assert datos["Date"].tolist() == [
+        pd.Timestamp("2024-01-01 10:00"),
+        pd.Timestamp("2024-07-01 10:00"),
+    ]
+
+def test_predict_file_excel_too_many_rows(monkeypatch):
+    monkeypatch.setattr("main.EXCEL_MAX_ROWS", 2)
+    csv_content = "Post Body\nUno\nDos\n"
+    response = client.post(
+        "/predict-file-excel/",
+        files={"file": ("test.csv", io.BytesIO(csv_content.encode("utf-8")), "text/csv")},
+    )
+    assert response.status_code == 413
+
+def test_predict_file_compact():
+    csv_content = "Post Body\nTexto positivo\n\nTexto negativo\n"
+    file = io.BytesIO(csv_content.encode("utf-8"))
+    response = client.post(
+        "/predict-file/?compact=true",
+        files={"file": ("test.csv", file, "text/csv")},
+    )
+    assert response.status_code == 200
+    encoded = response.json()["predicciones"]
+    assert encoded["dtype"] == "uint8"
+    labels = decode_labels(encoded)
+    assert len(labels) == 2
+    assert all(label in encoded["dictionary"] for label in labels)
+
+def test_encode_labels_roundtrip():
+    labels = pd.Series(["positivo", "negativo", "desconocido", "neutro", "otro"])
+    encoded = encode_labels(labels)
+    assert decode_labels(encoded) == [
+        "positivo", "negativo", "desconocido", "neutro", "desconocido"
+    ]
+
+def test_predict_file_incremental(tmp_path, monkeypatch):
+    monkeypatch.setattr("main.ANALYSIS_STORE_DIR", str(tmp_path))
+    day1 = "Tweet URL,Post Body\nu1,Me gusta\nu2,No me gusta\n"
+    day2 = day1 + "u3,Está bien\n"
+    for content, expected in [(day1, 2), (day2, 1)]:
+        response = client.post(
+            "/predict-file-incremental/?dataset=monitoreo",
+            files={"file": ("test.csv", io.BytesIO(content.encode("utf-8")), "text/csv")},
+        )
+        assert response.status_code == 200
+        assert response.json()["delta"]["classified_rows"] == expected
+    assert len(response.json()["predicciones"]) == 3
+    assert sum(response.json()["data"]["sentiment_counts"].values()) == 3
+
+    response = client.post(
+        "/predict-file-incremental/?dataset=monitoreo&sliding_window=false",
+        files={"file": ("test.csv", io.BytesIO(day2.encode("utf-8")), "text/csv")},
+    )
+    assert response.status_code == 200
+    assert response.json()["delta"]["classified_rows"] == 3
+    assert response.json()["delta"]["reclassified_all"]
+
+def test_models_admin_requires_token(monkeypatch):
+    body = {"name": "otro", "model_id": "no-existe"}
+    monkeypatch.setattr("main.ADMIN_TOKEN", None)
+    assert client.post("/models", json=body).status_code == 403
+    assert client.delete("/models/otro").status_code == 403
+
+    monkeypatch.setattr("main.ADMIN_TOKEN", "secreto")
+    response = client.post("/models", json=body, headers={"X-Admin-Token": "x"})
+    assert response.status_code == 403
+    response = client.delete("/models/otro", headers={"X-Admin-Token": "secreto"})
+    assert response.status_code == 404
+
+def test_models_status_and_unknown_model():
+    response = client.get("/models")
+    assert response.status_code == 200
+    assert response.json()["default"] in [m["name"] for m in response.json()["models"]]
+    response = client.post("/predict", json={"text": "Hola", "model": "no-existe"})
+    assert response.status_code == 404
+
+def test_admission_metrics():
+    client.post("/predict", json={"text": "Este es un texto de prueba."})
+    response = client.get("/admission")
+    assert response.status_code == 200
+    metrics = response.json()
+    assert metrics["interactive"]["admitted"] >= 1
+    assert metrics["interactive"]["active"] == 0
+    assert {"queue_depth", "avg_wait_ms", "rejected"} <= set(metrics["bulk"])
+    assert metrics["model"]["busy"] == 0
+
+def test_dashboard_modes_agree():
+    df = pd.DataFrame(
+        {
+            "Post Body": ["Muy buen servicio hoy", "Servicio malo de verdad"],
+            "Retweets": [1, 2],
+            "Likes": [3, 4],
+            "General": [1, 0],
+            "Bots": [0, 2],
+            "Sentimiento": ["positivo", "negativo"],
+        }
+    )
+    _, exact = build_dashboard_data(df.copy())
+    _, approx = build_dashboard_data(df.copy(), approximate=True)
+    incremental = render_aggregates(partial_aggregates(df.copy()))
+    for key in [
+        "total_retweets",
+        "total_likes",
+        "conteo_tipo_cuenta",
+        "sentimiento_tipo_cuenta",
+        "top_words",
+    ]:
+        assert incremental[key] == exact[key]
+    assert sorted(approx["top_words"]) == sorted(exact["top_words"])
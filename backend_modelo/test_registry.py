@@ -0,0 +1,73 @@
+import threading
+import pytest
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizer
+from registry import ModelRegistry, model_memory, vocab_fingerprint
+
+VOCAB = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "hola", "texto", "prueba"]
+
+@pytest.fixture
+def loader(tmp_path):
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(VOCAB) + "\n")
+    loaded = []
+
+    def load(model_id):
+        loaded.append(model_id)
+        config = BertConfig(
+            vocab_size=len(VOCAB),
+            hidden_size=16,
+            num_hidden_layers=1,
+            num_attention_heads=2,
+            intermediate_size=32,
+            num_labels=3,
+        )
+        return BertTokenizer(str(vocab_file)), BertForSequenceClassification(config)
+
+    load.loaded = loaded
+    return load
+
+def test_load_and_swap(loader):
+    registry = ModelRegistry(loader)
+    first = registry.load("default", "modelo-a")
+    assert registry.get() is first
+    second = registry.load("default", "modelo-b")
+    assert registry.get() is second
+    assert registry.get("default").model_id == "modelo-b"
+    status = registry.status()
+    assert [m["model_id"] for m in status["models"]] == ["modelo-b"]
+    expected = round(model_memory(second.model) / 2**20, 1)
+    assert status["models"][0]["memory_mb"] == expected
+
+def test_models_share_tokenizer(loader):
+    registry = ModelRegistry(loader)
+    a = registry.load("a", "modelo-a")
+    b = registry.load("b", "modelo-b")
+    assert a.tokenizer is b.tokenizer
+    assert registry.default == "a"
+
+def test_fingerprint_covers_normalization(tmp_path):
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(VOCAB) + "\n")
+    base = vocab_fingerprint(BertTokenizer(str(vocab_file)))
+    assert base == vocab_fingerprint(BertTokenizer(str(vocab_file)))
+    for options in [
+        {"strip_accents": False},
+        {"tokenize_chinese_chars": False},
+        {"model_max_length": 128},
+    ]:
+        assert vocab_fingerprint(BertTokenizer(str(vocab_file), **options)) != base
+
+def test_background_load_and_unload(loader):
+    registry = ModelRegistry(loader)
+    registry.load("default", "modelo-a")
+    assert registry.load_in_background("nuevo", "modelo-b", make_default=True)
+    for thread in threading.enumerate():
+        if thread.name == "load-nuevo":
+            thread.join()
+    assert registry.default == "nuevo"
+    assert registry.status()["loading"] == {}
+    registry.unload("default")
+    with pytest.raises(KeyError):
+        registry.get("default")
+    with pytest.raises(ValueError):
+        registry.unload("nuevo")
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from sketches import (
+    BottomKSample,
+    CountMinSketch,
+    DashboardSketch,
+    HyperLogLog,
+    SpaceSaving,
+)
+
+def zipf_stream(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"w{v}" for v in rng.zipf(1.5, n)]
+
+def test_count_min_overestimates_within_bound():
+    stream = zipf_stream(20000)
+    sketch = CountMinSketch(width=1024, depth=4)
+    sketch.update(stream)
+    exact = pd.Series(stream).value_counts()
+    estimates = sketch.estimate(exact.index)
+    assert (estimates >= exact.to_numpy()).all()
+    assert (estimates - exact.to_numpy()).max() <= np.e / 1024 * len(stream) * 2
+
+def test_space_saving_finds_heavy_hitters_across_chunks_and_merge():
+    stream = zipf_stream(30000, seed=1)
+    left, right = SpaceSaving(k=50), SpaceSaving(k=50)
+    for start in range(0, 15000, 1000):
+        left.update(stream[start : start + 1000])
+    right.update(stream[15000:])
+    merged = left.merge(right)
+    exact = pd.Series(stream).value_counts()
+    assert list(merged.top(5).index) == list(exact.index[:5])
+    for word, count in merged.top(10).items():
+        assert count >= exact[word]
+        assert count - exact[word] <= merged.error_bound
+
+def test_hyperloglog_relative_error_and_merge():
+    a, b = HyperLogLog(), HyperLogLog()
+    a.update([f"@user{i}" for i in range(30000)])
+    b.update([f"@user{i}" for i in range(20000, 50000)])
+    assert abs(a.count() - 30000) / 30000 < 4 * a.relative_error
+    assert abs(a.merge(b).count() - 50000) / 50000 < 4 * a.relative_error
+    small = HyperLogLog()
+    small.update(["a", "b", "c", "a"])
+    assert small.count() == 3
+
+def test_bottom_k_sample():
+    sample = BottomKSample(k=3, seed=0)
+    sample.update(list(range(10)))
+    other = BottomKSample(k=3, seed=1)
+    other.update(list(range(10, 20)))
+    sample.merge(other)
+    assert len(sample.items) == 3
+    assert len(set(sample.items)) == 3
+
+def test_dashboard_sketch_render():
+    df = pd.DataFrame(
+        {
+            "Post Body": ["gobierno anuncia obras", "obras retrasadas", "buen gobierno"],
+            "Name": ["Ana", "Luis", "Ana"],
+            "Handle": ["@ana", "@luis", "@ana"],
+            "Interacciones y Audiencia": [5, 20, 1],
+            "Sentimiento": ["positivo", "negativo", "positivo"],
+        }
+    )
+    sketch = DashboardSketch(stopwords=set(), seed=0)
+    sketch.update(df.iloc[:2])
+    sketch.update(df.iloc[2:])
+    data = sketch.render({})
+    assert dict(data["top_words"])["gobierno"] == 2
+    assert data["top_users"][0]["Handle"] == "@luis"
+    assert data["top_users"][1]["Interacciones y Audiencia"] == 6
+    assert data["unique_handles"] == 2
+    assert len(data["sample_posts"]["positivo"]) == 2
+
+def sketch_users(sigma):
+    rng = np.random.default_rng(0)
+    # 60k filas de 5k usuarios; 'sigma' controla cuán desigual es la actividad
+    weights = rng.lognormal(0, sigma, 5000)
+    users = rng.choice(5000, 60000, p=weights / weights.sum())
+    df = pd.DataFrame(
+        {
+            "Name": [f"user{u}" for u in users],
+            "Handle": [f"@user{u}" for u in users],
+            "Interacciones y Audiencia": rng.integers(0, 10, len(users)),
+        }
+    )
+    sketch = DashboardSketch(stopwords=set(), seed=0)
+    for start in range(0, len(df), 5000):
+        sketch.update(df.iloc[start : start + 5000])
+    data = sketch.render({})
+    exact = df.groupby("Handle")["Interacciones y Audiencia"].sum()
+    reported = {u["Handle"]: u["Interacciones y Audiencia"] for u in data["top_users"]}
+    return exact, reported, data["approximation"]["top_users_max_error"]
+
+def test_dashboard_sketch_top_users_match_groupby():
+    exact, reported, _ = sketch_users(sigma=0.5)
+    assert reported == exact.nlargest(10).to_dict()
+
+def test_dashboard_sketch_top_users_within_bound():
+    # Actividad casi uniforme: el ranking es aproximado, pero cada total es
+    # una cota superior dentro del error informado
+    exact, reported, max_error = sketch_users(sigma=0.0)
+    for handle, total in reported.items():
+        assert exact[handle] <= total <= exact[handle] + max_error
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from timeseries import (
+    epoch_buckets,
+    month_records,
+    normalize_dates,
+    parse_granularities,
+    rolling_ratios,
+    sentiment_series,
+)
+
+def test_parse_granularities():
+    assert parse_granularities("hour, day,hour") == ["hour", "day"]
+    assert parse_granularities(None) == []
+    with pytest.raises(ValueError):
+        parse_granularities("minute")
+
+def test_week_buckets_start_on_monday():
+    dates = pd.Series(pd.to_datetime(["2024-01-01", "2024-01-07", "2024-01-08"]))
+    buckets, valid = epoch_buckets(dates, "week")
+    assert valid.all()
+    assert buckets[0] == buckets[1] != buckets[2]
+    series = sentiment_series(dates, pd.Series(["positivo"] * 3), ["week"])
+    assert series["series"]["week"]["periods"] == ["2024-01-01", "2024-01-08"]
+
+def test_sentiment_series_counts_and_month_records():
+    dates = pd.Series(
+        pd.to_datetime(["2024-01-05 10:30", "2024-01-05 10:45", "2024-02-01 00:00", None])
+    )
+    sentiments = pd.Series(["positivo", "negativo", "positivo", "neutro"])
+    series = sentiment_series(dates, sentiments, ["month", "hour"], window=2)
+    month = series["series"]["month"]
+    assert month["periods"] == ["2024-01", "2024-02"]
+    assert month["counts"]["positivo"] == [1, 1]
+    assert month["counts"]["neutro"] == [0, 0]
+    assert month["ratios"]["positivo"] == [0.5, 0.6667]
+    assert series["series"]["hour"]["periods"][0] == "2024-01-05 10:00"
+    assert month_records(month) == [
+        {"YearMonth": "2024-01", "Sentimiento": "negativo", "Conteo": 1},
+        {"YearMonth": "2024-01", "Sentimiento": "positivo", "Conteo": 1},
+        {"YearMonth": "2024-02", "Sentimiento": "positivo", "Conteo": 1},
+    ]
+
+def test_sentiment_series_by_key():
+    dates = pd.Series(pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-02"]))
+    sentiments = pd.Series(["positivo", "negativo", "positivo"])
+    keys = pd.Series(["@a", "@b", "@a"])
+    series = sentiment_series(dates, sentiments, ["day"], keys=keys, top_keys=1)
+    assert list(series["by_key"]["day"]) == ["@a"]
+    assert series["by_key"]["day"]["@a"]["counts"]["positivo"] == [1, 1]
+
+def test_normalize_dates_timezone():
+    dates = pd.Series(pd.to_datetime(["2024-01-01 03:00"]).tz_localize("UTC"))
+    assert normalize_dates(dates).iloc[0] == pd.Timestamp("2024-01-01 03:00")
+    lima = normalize_dates(dates, "America/Lima")
+    assert lima.iloc[0] == pd.Timestamp("2023-12-31 22:00")
+
+def test_rolling_ratios_sparse_buckets():
+    unique = np.array([0, 1, 5, 10**9], dtype=np.int64)
+    counts = np.array([[1, 0], [0, 1], [3, 1], [0, 2]], dtype=np.int64)
+    ratios = rolling_ratios(unique, counts, window=5)
+    # La ventana que termina en el bucket 5 cubre 1..5 y deja fuera al 0
+    expected = [[1.0, 0.0], [0.5, 0.5], [0.6, 0.4], [0.0, 1.0]]
+    np.testing.assert_allclose(ratios, expected)
+    np.testing.assert_allclose(
+        rolling_ratios(unique, counts, window=6)[2], [4 / 6, 2 / 6]
+    )
@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+# Unidad numpy de cada granularidad; los buckets son enteros desde 1970-01-01
+GRANULARITIES = {
+    "hour": "h",
+    "day": "D",
+    "week": "D",
+    "month": "M",
+}
+
+SENTIMENTS = ["negativo", "neutro", "positivo", "desconocido"]
+
+# 1970-01-01 fue jueves: desplaza 3 días para que las semanas empiecen en lunes
+WEEK_OFFSET_DAYS = 3
+
+
+def parse_granularities(granularity: str | None) -> list[str]:
+    """
+    Convierte el parámetro 'granularity' (separado por comas) en una lista válida.
+
+    Parámetros:
+        granularity (str | None): Por ejemplo "hour,day,week".
+
+    Retorna:
+        list[str]: Granularidades sin duplicados, en el orden recibido.
+    """
+    if not granularity:
+        return []
+    grans = [g.strip().lower() for g in granularity.split(",") if g.strip()]
+    unknown = [g for g in grans if g not in GRANULARITIES]
+    if unknown:
+        raise ValueError(
+            f"Granularidad no soportada: {', '.join(unknown)}. "
+            f"Use: {', '.join(GRANULARITIES)}."
+        )
+    return list(dict.fromkeys(grans))
+
+
+def normalize_dates(dates: pd.Series, tz: str | None = None) -> pd.Series:
+    """
+    Quita la zona horaria de una serie de fechas.
+
+    Igual que en el resto del backend se conserva la hora local de cada valor;
+    si se indica 'tz', las fechas con zona horaria se convierten antes a ella.
+    Las columnas con desfases mezclados se interpretan en UTC.
+
+    Parámetros:
+        dates (pd.Series): Fechas (con o sin zona horaria).
+        tz (str | None): Zona horaria de destino, por ejemplo "America/Lima".
+
+    Retorna:
+        pd.Series: Fechas datetime64[ns] sin zona horaria.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce", utc=True)
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        if tz:
+            dates = dates.dt.tz_convert(tz)
+        dates = dates.dt.tz_localize(None)
+    return dates
+
+
+def epoch_buckets(dates: pd.Series, granularity: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula el bucket entero de cada fecha sin materializar cadenas.
+
+    Parámetros:
+        dates (pd.Series): Fechas sin zona horaria.
+        granularity (str): 'hour', 'day', 'week' o 'month'.
+
+    Retorna:
+        tuple[np.ndarray, np.ndarray]: Buckets int64 y máscara de fechas válidas.
+    """
+    values = dates.to_numpy(dtype="datetime64[ns]")
+    valid = ~np.isnat(values)
+    buckets = values.astype(f"datetime64[{GRANULARITIES[granularity]}]").astype(
+        np.int64
+    )
+    if granularity == "week":
+        buckets = (buckets + WEEK_OFFSET_DAYS) // 7
+    return buckets, valid
+
+
+def bucket_labels(buckets: np.ndarray, granularity: str) -> list[str]:
+    """
+    Convierte buckets enteros en etiquetas legibles.
+
+    Las semanas se etiquetan con la fecha del lunes en que empiezan y los meses
+    con el formato 'AAAA-MM' que ya usa 'sentiment_month'.
+    """
+    if granularity == "week":
+        values = (buckets * 7 - WEEK_OFFSET_DAYS).astype("datetime64[D]")
+    else:
+        values = buckets.astype(f"datetime64[{GRANULARITIES[granularity]}]")
+    if granularity == "hour":
+        return [str(v).replace("T", " ") + ":00" for v in values]
+    return [str(v) for v in values]
+
+
+def count_by_bucket(
+    buckets: np.ndarray, codes: np.ndarray, n_labels: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Cuenta filas por (bucket, etiqueta) con un único bincount.
+
+    Parámetros:
+        buckets (np.ndarray): Bucket de cada fila válida.
+        codes (np.ndarray): Código de etiqueta de cada fila válida.
+        n_labels (int): Número de etiquetas posibles.
+
+    Retorna:
+        tuple[np.ndarray, np.ndarray]: Buckets distintos ordenados y matriz de
+        conteos (n_buckets, n_labels).
+    """
+    unique, inverse = np.unique(buckets, return_inverse=True)
+    flat = np.bincount(inverse * n_labels + codes, minlength=len(unique) * n_labels)
+    return unique, flat.reshape(len(unique), n_labels)
+
+
+def rolling_ratios(
+    unique: np.ndarray, counts: np.ndarray, window: int
+) -> np.ndarray:
+    """
+    Proporción de cada etiqueta en una ventana móvil de 'window' buckets.
+
+    Los buckets sin publicaciones cuentan como ceros, de modo que la ventana
+    siempre cubre el mismo intervalo de tiempo. Las sumas se calculan solo
+    sobre los buckets presentes, así que la memoria no depende del rango de
+    fechas.
+
+    Retorna:
+        np.ndarray: Proporciones (n_buckets, n_labels) alineadas con 'unique';
+        NaN si la ventana no tiene publicaciones.
+    """
+    cumsum = np.vstack([np.zeros((1, counts.shape[1]), np.int64), counts.cumsum(0)])
+    # Primer bucket presente dentro de la ventana que termina en cada bucket
+    start = np.searchsorted(unique, unique - window + 1, side="left")
+    sums = cumsum[1:] - cumsum[start]
+    totals = sums.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(totals > 0, sums / totals, np.nan)
+
+
+def series_payload(
+    unique: np.ndarray,
+    counts: np.ndarray,
+    granularity: str,
+    labels: list[str],
+    window: int | None = None,
+) -> dict:
+    """
+    Serializa los conteos de una granularidad en formato columnar.
+    """
+    payload = {
+        "periods": bucket_labels(unique, granularity),
+        "counts": {label: counts[:, i].tolist() for i, label in enumerate(labels)},
+    }
+    if window and len(unique):
+        ratios = np.round(rolling_ratios(unique, counts, window), 4)
+        payload["ratios"] = {
+            label: [None if np.isnan(v) else float(v) for v in ratios[:, i]]
+            for i, label in enumerate(labels)
+        }
+    return payload
+
+
+def sentiment_series(
+    dates: pd.Series,
+    sentiments: pd.Series,
+    granularities: list[str],
+    keys: pd.Series | None = None,
+    window: int | None = None,
+    tz: str | None = None,
+    top_keys: int = 10,
+    labels: list[str] = SENTIMENTS,
+) -> dict:
+    """
+    Calcula series temporales de sentimiento para varias granularidades.
+
+    Las fechas se normalizan y las etiquetas se codifican una sola vez; cada
+    granularidad solo requiere recalcular el bucket entero de cada fila.
+
+    Parámetros:
+        dates (pd.Series): Fecha de cada publicación.
+        sentiments (pd.Series): Etiqueta de sentimiento de cada publicación.
+        granularities (list[str]): Granularidades a calcular.
+        keys (pd.Series | None): Clave opcional (p. ej. 'Handle') para series
+            por cuenta; solo se devuelven las 'top_keys' con más publicaciones.
+        window (int | None): Tamaño de la ventana móvil de proporciones.
+        tz (str | None): Zona horaria a la que convertir fechas con zona.
+        labels (list[str]): Etiquetas posibles, en orden de salida.
+
+    Retorna:
+        dict: {'series': {granularidad: payload}} y, si hay claves,
+        {'by_key': {granularidad: {clave: payload}}}.
+    """
+    dates = normalize_dates(dates, tz)
+    codes = pd.Categorical(sentiments, categories=labels).codes.astype(np.int64)
+    mask = codes >= 0
+    key_codes = None
+    if keys is not None:
+        key_codes, key_values = pd.factorize(keys)
+        key_totals = np.bincount(key_codes[key_codes >= 0], minlength=len(key_values))
+        selected = np.argsort(-key_totals, kind="stable")[:top_keys]
+
+    result = {"series": {}}
+    if keys is not None:
+        result["by_key"] = {}
+    for gran in granularities:
+        buckets, valid = epoch_buckets(dates, gran)
+        rows = valid & mask
+        unique, counts = count_by_bucket(buckets[rows], codes[rows], len(labels))
+        result["series"][gran] = series_payload(unique, counts, gran, labels, window)
+        if keys is None:
+            continue
+        by_key = {}
+        for key in selected:
+            key_rows = rows & (key_codes == key)
+            if not key_rows.any():
+                continue
+            unique, counts = count_by_bucket(
+                buckets[key_rows], codes[key_rows], len(labels)
+            )
+            by_key[str(key_values[key])] = series_payload(
+                unique, counts, gran, labels, window
+            )
+        result["by_key"][gran] = by_key
+    return result
+
+
+def month_records(payload: dict) -> list[dict]:
+    """
+    Convierte el payload mensual al formato de registros de 'sentiment_month'.
+    """
+    records = []
+    for i, period in enumerate(payload["periods"]):
+        for label in sorted(payload["counts"]):
+            count = payload["counts"][label][i]
+            if count:
+                records.append(
+                    {"YearMonth": period, "Sentimiento": label, "Conteo": count}
+                )
+    return records
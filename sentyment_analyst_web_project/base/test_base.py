@@ -46,4 +46,24 @@ def test_upload_file_post_error(mock_post, client):
     url = reverse('upload_file')
     response = client.post(url, {'file': file}, format='multipart')
     assert response.status_code == 200
-    assert b'Archivo inv' in response.content  # Busca parte del mensaje de error
\ No newline at end of file
+    assert b'Archivo inv' in response.content  # Busca parte del mensaje de error
+
+@pytest.mark.django_db
+@patch("base.views.requests.post")
+def test_upload_file_post_compact(mock_post, client):
+    """Verifica que la vista pida y reenvíe las predicciones compactas."""
+    compact = {"dictionary": ["negativo", "neutro", "positivo"], "dtype": "uint8", "codes": "AgA="}
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"data": {}, "predicciones": compact}
+    mock_post.return_value = mock_response
+
+    file = io.BytesIO(b"Post Body\nTexto positivo\nTexto negativo\n")
+    file.name = "test.csv"
+
+    url = reverse('upload_file')
+    response = client.post(url, {'file': file}, format='multipart')
+    assert response.status_code == 200
+    assert mock_post.call_args.kwargs["params"] == {"compact": "true"}
+    assert mock_response.json.call_count == 1
+    assert response.json()["predicciones"] == compact
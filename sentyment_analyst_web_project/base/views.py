@@ -10,13 +10,17 @@ def upload_file(request):
     context = {}
     if request.method == "POST" and request.FILES.get("file"):
         file = request.FILES["file"]
+        # Pide las predicciones codificadas (uint8 + diccionario); requests ya
+        # acepta respuestas gzip por defecto
         response = requests.post(
             "http://localhost:8000/predict-file/",
+            params={"compact": "true"},
             files={"file": (file.name, file.read(), file.content_type)},
         )
         if response.status_code == 200:
-            context["data"] = response.json()["data"]
-            context["predicciones"] = response.json()["predicciones"]
+            payload = response.json()
+            context["data"] = payload["data"]
+            context["predicciones"] = payload["predicciones"]
             context["file_name"] = file.name
             # Devuelve solo el contexto como JSON
             return JsonResponse(context)